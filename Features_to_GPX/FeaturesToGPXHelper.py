@@ -0,0 +1,580 @@
+'''
+FeaturesToGPXHelper.py
+The GPX writers and the single and batch exports behind FeaturesToGPX.py, in a
+module of its own so the worker processes of a batch export can import it.
+'''
+
+import arcpy
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import tempfile
+import multiprocessing
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import PoolHelper
+
+# Attributes of the gpx element, in the (sorted) order they are written
+gpxAttributes = [("creator", "Esri"),
+                 ("version", "1.1"),
+                 ("xalan", "http://xml.apache.org/xalan"),
+                 ("xmlns", "http://www.topografix.com/GPX/1/1"),
+                 ("xsi", "http://www.w3.org/2001/XMLSchema-instance")]
+
+
+def escapeText(text):
+    """Escape element text and encode it as UTF-8, as ElementTree does."""
+    if not isinstance(text, basestring):
+        raise TypeError("cannot serialize %r (type %s)" % (text, type(text).__name__))
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if isinstance(text, unicode):
+        text = text.encode("utf-8", "xmlcharrefreplace")
+    return text
+
+
+def escapeAttrib(text):
+    """Escape an attribute value and encode it as UTF-8, as ElementTree does."""
+    text = escapeText(text).replace('"', "&quot;").replace("\n", "&#10;")
+    return text
+
+
+def escapePretty(text):
+    """Escape text or an attribute value the way minidom writes it."""
+    return escapeText(text).replace('"', "&quot;")
+
+
+class GPXWriter(object):
+    """Writes a GPX 1.1 document to an open file as the points arrive, so memory
+    use does not grow with the number of points.  The output is the same as
+    ElementTree gives for the whole document or, with pretty=True, as minidom's
+    toprettyxml(indent="  ") of it.  Waypoints that arrive while a track is open
+    belong after it, so they are held in a temporary file until it ends.
+    """
+
+    def __init__(self, gpxFile, pretty=False):
+        self.gpxFile = gpxFile
+        self.empty = True      # nothing written inside the gpx element yet
+        self.inTrack = False
+        self.inSegment = False # <trkseg> written, it waits for the first trkpt
+        self.held = None       # waypoints waiting for the open track to end
+        if pretty:
+            self.newl, self.indent = "\n", "  "
+            self.emptyTag, self.escape, self.escapeAttrib = "/>", escapePretty, escapePretty
+            gpxFile.write('<?xml version="1.0" ?>\n')
+        else:
+            self.newl, self.indent = "", ""
+            self.emptyTag, self.escape, self.escapeAttrib = " />", escapeText, escapeAttrib
+            gpxFile.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        gpxFile.write("<gpx" + "".join(' %s="%s"' % (name, self.escapeAttrib(value))
+                                       for name, value in gpxAttributes))
+
+    def _element(self, tag, text, depth):
+        """An element with text only; empty text gives an empty element tag."""
+        if text:
+            return "%s<%s>%s</%s>%s" % (self.indent * depth, tag, self.escape(text), tag, self.newl)
+        return "%s<%s%s%s" % (self.indent * depth, tag, self.emptyTag, self.newl)
+
+    def _point(self, tag, lon, lat, depth):
+        return '%s<%s lat="%s" lon="%s">%s' % (self.indent * depth, tag, self.escapeAttrib(lat),
+                                               self.escapeAttrib(lon), self.newl)
+
+    def _end(self, tag, depth):
+        return "%s</%s>%s" % (self.indent * depth, tag, self.newl)
+
+    def _content(self):
+        if self.empty:
+            self.gpxFile.write(">" + self.newl)
+            self.empty = False
+
+    def wpt(self, lon, lat, ele, time, name, desc):
+        self._content()
+        if self.inTrack:
+            if self.held is None:
+                self.held = tempfile.TemporaryFile()
+            out = self.held
+        else:
+            out = self.gpxFile
+        out.write(self._point("wpt", lon, lat, 1) +
+                  self._element("ele", ele, 2) + self._element("time", time, 2) +
+                  self._element("name", name, 2) + self._element("desc", desc, 2) +
+                  self._end("wpt", 1))
+
+    def startTrack(self, name, desc):
+        self._content()
+        self.endTrack()
+        self.gpxFile.write(self.indent + "<trk>" + self.newl +
+                           self._element("name", name, 2) + self._element("desc", desc, 2))
+        self.inTrack = True
+
+    def trkpt(self, lon, lat, ele, time):
+        if not self.inSegment:
+            self.gpxFile.write(self.indent * 2 + "<trkseg>" + self.newl)
+            self.inSegment = True
+        self.gpxFile.write(self._point("trkpt", lon, lat, 3) +
+                           self._element("ele", ele, 4) + self._element("time", time, 4) +
+                           self._end("trkpt", 3))
+
+    def endTrack(self):
+        if self.inTrack:
+            if self.inSegment:
+                self.gpxFile.write(self._end("trkseg", 2))
+            else:
+                self.gpxFile.write(self.indent * 2 + "<trkseg" + self.emptyTag + self.newl)
+            self.gpxFile.write(self._end("trk", 1))
+            self.inTrack = self.inSegment = False
+            if self.held is not None:
+                self.held.seek(0)
+                shutil.copyfileobj(self.held, self.gpxFile)
+                self.held.close()
+                self.held = None
+
+    def close(self):
+        """End the document; the file itself is left open."""
+        self.endTrack()
+        if self.empty:
+            self.gpxFile.write(self.emptyTag + self.newl)
+        else:
+            self.gpxFile.write("</gpx>" + self.newl)
+
+
+class SplitGPXWriter(object):
+    """GPXWriter over one or more files.  With a split of ("points", N) or
+    ("bytes", N) a new file is started before the next point once the current one
+    holds N points or bytes, so files may run over N by one point.  A track that is
+    split carries on in the next file, from its next trkpt, as a track of the same
+    name.  With
+    ("track", None) each track starts a new file; waypoints go in the file that is
+    open when they arrive.  Every file is a complete GPX document.
+    """
+
+    def __init__(self, outGPX, pretty=False, split=None):
+        self.outGPX = outGPX
+        self.pretty = pretty
+        self.mode, self.limit = split or (None, None)
+        self.files = []
+        self.gpxFile = None
+        self.writer = None
+        self.track = None      # name and desc of the open track
+        self.pending = None    # track to carry on in this file at its next trkpt
+        self._open()
+
+    def _open(self):
+        if self.mode:
+            root, ext = os.path.splitext(self.outGPX)
+            path = "{}_{}{}".format(root, len(self.files) + 1, ext or ".gpx")
+        else:
+            path = self.outGPX
+        self.gpxFile = open(path, "w")
+        self.files.append(path)
+        self.writer = GPXWriter(self.gpxFile, pretty=self.pretty)
+        self.points = 0
+        self.tracks = 0
+
+    def _size(self):
+        size = self.gpxFile.tell()
+        if self.writer.held is not None:
+            size += self.writer.held.tell()
+        return size
+
+    def _full(self):
+        if not self.points:
+            return False
+        if self.mode == "points":
+            return self.points >= self.limit
+        if self.mode == "bytes":
+            return self._size() >= self.limit
+        return False
+
+    def _rollover(self):
+        self.pending = self.track or self.pending
+        self.track = None
+        self.writer.close()
+        self.gpxFile.close()
+        self._open()
+
+    def wpt(self, lon, lat, ele, time, name, desc):
+        if self._full():
+            self._rollover()
+        self.writer.wpt(lon, lat, ele, time, name, desc)
+        self.points += 1
+
+    def startTrack(self, name, desc):
+        self.track = self.pending = None
+        if (self.mode == "track" and self.tracks) or self._full():
+            self._rollover()
+        self.writer.startTrack(name, desc)
+        self.track = (name, desc)
+        self.tracks += 1
+
+    def trkpt(self, lon, lat, ele, time):
+        if self._full():
+            self._rollover()
+        if self.pending:
+            self.writer.startTrack(*self.pending)
+            self.track, self.pending = self.pending, None
+        self.writer.trkpt(lon, lat, ele, time)
+        self.points += 1
+
+    def endTrack(self):
+        self.writer.endTrack()
+        self.track = self.pending = None
+
+    def close(self):
+        """End the current document; closeFile closes the file itself."""
+        self.writer.close()
+
+    def closeFile(self):
+        self.gpxFile.close()
+
+
+def parseSplit(split):
+    """
+    ("points", N), ("bytes", N) or ("track", None) from the Split tool parameter,
+    None when it is empty.  Raises ValueError for anything else.
+    """
+    if not split:
+        return None
+    mode, _, limit = str(split).strip().lower().partition(":")
+    if mode == "track" and not limit:
+        return mode, None
+    if mode in ("points", "bytes"):
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit > 0:
+            return mode, limit
+    raise ValueError('Split must be "points:N", "bytes:N" or "track", not "{}"'.format(split))
+
+
+def featuresToGPX(inputFC, outGPX, pretty=False, split=None):
+    ''' This is called by the __main__ if run from a tool or at the command line
+    '''
+
+    descInput = arcpy.Describe(inputFC)
+    if descInput.spatialReference.factoryCode <> 4326:
+        arcpy.AddWarning("Input data is not projected in WGS84, features were reprojected on the fly to create the GPX.")
+
+    # Write the output GPX file(s) as the points are read
+    startTime = time.time()
+    stats = {"input": inputFC, "output": outGPX, "features": 0, "points": 0}
+    writer = SplitGPXWriter(outGPX, pretty=str(pretty).lower() == "true", split=parseSplit(split))
+    try:
+        stats.update(generatePointsFromFeatures(inputFC, descInput, writer))
+        writer.close()
+    except TypeError:
+        arcpy.AddError("Error serializing GPX into the file.")
+        stats["error"] = "Error serializing GPX into the file."
+    finally:
+        writer.closeFile()
+    stats["files"] = writer.files
+    stats["bytes"] = sum(os.path.getsize(path) for path in writer.files)
+    stats["seconds"] = time.time() - startTime
+    return stats
+
+
+def generatePointsFromFeatures(inputFC, descInput, writer):
+
+    # Get list of available fields
+    fields = [f.name for f in arcpy.ListFields(inputFC)]
+    valuesDict = {"Elevation": 0, "Name": "", "Descript": "", "DateTime": "", "Type": "", "PntX": 0, "PntY": 0}
+    fieldNameDict = {"Elevation": 0, "Name": 1, "Descript": 2, "DateTime": 3, "Type": 4, "PntX": 5, "PntY": 6}
+
+    cursorFields = ["OID@", "SHAPE@"]
+
+    for key, item in valuesDict.items():
+        if key in fields:
+            fieldNameDict[key] = len(cursorFields)  #assign current index
+            cursorFields.append(key)   #build up list of fields for cursor
+        else:
+            fieldNameDict[key] = None
+
+    # Everything attHelper needs from the schema is resolved once per layer,
+    # the per vertex work is then only the field reads and number formatting
+    hasZ = descInput.hasZ
+    elevationIndex = fieldNameDict["Elevation"]
+    nameIndex = fieldNameDict["Name"]
+    descriptIndex = fieldNameDict["Descript"]
+    dateTimeIndex = fieldNameDict["DateTime"]
+    epochTime = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(0))
+
+    # Missing fields are constant for the whole layer
+    if nameIndex is None:
+        valuesDict["Name"] = " "
+    if descriptIndex is None:
+        valuesDict["Descript"] = " "
+    if elevationIndex is None and not hasZ:
+        valuesDict["Elevation"] = "0"
+
+    # GPX 'time' value must not be empty. Attempt to read from attribute list
+    # or set to Zero, warning once per layer rather than once per vertex
+    if dateTimeIndex is None:
+        arcpy.AddWarning("DateTime field not found, setting GPX times to epoch zero")
+        valuesDict["DateTime"] = epochTime
+
+    # Vertices of a feature share its DateTime, so the last value is cached
+    timeCache = [object(), epochTime, False]  # [row_time, formatted_time, warned]
+
+    def attHelper(row):
+        # helper function to get/set field attributes for output gpx file
+
+        pnt = row[1].getPart()
+        valuesDict["PntX"] = str(pnt.X)
+        valuesDict["PntY"] = str(pnt.Y)
+
+        if hasZ:
+            Z = pnt.Z
+            if Z:
+                valuesDict["Elevation"] = str(Z)
+            elif elevationIndex is not None:
+                valuesDict["Elevation"] = str(row[elevationIndex])
+            else:
+                valuesDict["Elevation"] = "0"
+        elif elevationIndex is not None:
+            valuesDict["Elevation"] = str(row[elevationIndex])
+
+        if nameIndex is not None:
+            valuesDict["Name"] = row[nameIndex]
+        if descriptIndex is not None:
+            valuesDict["Descript"] = row[descriptIndex]
+
+        if dateTimeIndex is not None:
+            row_time = row[dateTimeIndex]
+            if row_time is not timeCache[0] and row_time != timeCache[0]:
+                try:
+                    formatted_time = datetime.strftime(row_time, "%Y-%m-%dT%H:%M:%SZ")
+                        # note reversed param order vs time.strftime() is correct
+                except Exception:
+                    if not timeCache[2]:
+                        arcpy.AddWarning("Failed to parse DateTime field. GPX times set to epoch zero")
+                        timeCache[2] = True
+                    formatted_time = epochTime
+                timeCache[0] = row_time
+                timeCache[1] = formatted_time
+            valuesDict["DateTime"] = timeCache[1]
+
+        return
+    #-------------end helper function-----------------
+
+
+    def getValuesFromFC( inputFC, cursorFields ):
+
+        previousPartNum = 0
+        startTrack = True
+        previousOID = None
+        shapeType = descInput.shapeType
+        typeIndex = fieldNameDict["Type"]
+
+        # Loop through all features and parts
+        with arcpy.da.SearchCursor(inputFC, cursorFields, spatial_reference="4326", explode_to_points=True) as searchCur:
+            for row in searchCur:
+                if row[0] != previousOID:
+                    stats["features"] += 1
+                    previousOID = row[0]
+
+                if shapeType == "Polyline":
+                    # explode_to_points gives a row per vertex, a new feature starts a track
+                    attHelper(row)
+                    newPart = False
+                    if not row[0] == previousPartNum or startTrack == True:
+                        startTrack = False
+                        newPart = True
+                    previousPartNum = row[0]
+
+                    yield "trk", newPart
+
+                elif shapeType == "Multipoint" or shapeType == "Point":
+                    #check to see if data was original GPX with "Type" of "TRKPT" or "WPT"
+                    trkType = row[typeIndex].upper() if typeIndex is not None else None
+
+                    attHelper(row)
+
+                    if trkType == "TRKPT":
+                        newPart = False
+                        if previousPartNum == 0:
+                            newPart = True
+                            previousPartNum = 1
+
+                        yield "trk", newPart
+
+                    else:
+                        yield "wpt", None
+
+    #---------end get values function-------------
+
+
+    stats = {"features": 0, "points": 0}
+    for index, gpxValues in enumerate(getValuesFromFC(inputFC, cursorFields)):
+
+        if gpxValues[0] == "wpt":
+            writer.wpt(valuesDict["PntX"], valuesDict["PntY"], valuesDict["Elevation"],
+                       valuesDict["DateTime"], valuesDict["Name"], valuesDict["Descript"])
+
+        else:  #TRKS
+            if gpxValues[1]:
+                # Elements for the start of a new track
+                writer.startTrack(valuesDict["Name"], valuesDict["Descript"])
+
+            writer.trkpt(valuesDict["PntX"], valuesDict["PntY"], valuesDict["Elevation"],
+                         valuesDict["DateTime"])
+
+        stats["points"] += 1
+
+    return stats
+
+
+def hasWildcards(path):
+    """True for * or ? in path.  [ is not a wildcard here, it turns up in folder names."""
+    return "*" in path or "?" in path
+
+
+def globPattern(path):
+    """path as a glob pattern that matches [ literally."""
+    return path.replace("[", "[[]")
+
+
+def isBatchInput(inputFC):
+    """
+    True when the input asks for a batch export rather than one GPX file: a list,
+    a path with wildcards or a workspace, folder or feature dataset.  An existing
+    feature class is always a single input, whatever its path holds.
+    """
+    if ";" in inputFC:
+        return True
+    if arcpy.Exists(inputFC):
+        return arcpy.Describe(inputFC).dataType in ("Workspace", "Folder", "FeatureDataset")
+    return hasWildcards(inputFC)
+
+
+def listFeatureClasses(workspace, wildcard="*"):
+    """Feature classes in a workspace, including those in its feature datasets."""
+    previousWorkspace = arcpy.env.workspace
+    arcpy.env.workspace = workspace
+    try:
+        found = []
+        for dataset in [""] + (arcpy.ListDatasets("*", "Feature") or []):
+            for fc in arcpy.ListFeatureClasses(wildcard, feature_dataset=dataset) or []:
+                found.append(os.path.join(workspace, dataset, fc))
+        return found
+    finally:
+        arcpy.env.workspace = previousWorkspace
+
+
+def expandInputs(inputs):
+    """
+    Input feature classes from a list or a ";" separated string of paths.  A path
+    with wildcards is split into its workspace, which may itself be a glob, and a
+    wildcard for ListFeatureClasses.  A workspace or folder on its own gives all of
+    its feature classes.  Each feature class is listed once, in the order found.
+    """
+    if isinstance(inputs, basestring):
+        inputs = inputs.split(";")
+    inputFCs = []
+    for item in inputs:
+        item = item.strip().strip("'\"")  # multivalue parameters quote paths with spaces
+        if not item:
+            continue
+        if hasWildcards(item) and not arcpy.Exists(item):
+            workspacePattern, wildcard = os.path.split(item)
+            for workspace in sorted(glob.glob(globPattern(workspacePattern))):
+                inputFCs.extend(listFeatureClasses(workspace, wildcard))
+        elif arcpy.Exists(item) and arcpy.Describe(item).dataType in ("Workspace", "Folder", "FeatureDataset"):
+            inputFCs.extend(listFeatureClasses(item))
+        else:
+            inputFCs.append(item)
+
+    # The same feature class can be named twice, e.g. by a folder and a wildcard
+    seen = set()
+    unique = []
+    for inputFC in inputFCs:
+        key = os.path.normcase(os.path.normpath(inputFC))
+        if key not in seen:
+            seen.add(key)
+            unique.append(inputFC)
+    return unique
+
+
+def outputNames(inputFCs, outFolder):
+    """One .gpx path in outFolder per input, numbered where input names collide."""
+    outGPXs = []
+    used = set()
+    for inputFC in inputFCs:
+        name = os.path.splitext(os.path.basename(inputFC))[0]
+        candidate, number = name, 1
+        while candidate.lower() in used:
+            candidate = "{}_{}".format(name, number)
+            number += 1
+        used.add(candidate.lower())
+        outGPXs.append(os.path.join(outFolder, candidate + ".gpx"))
+    return outGPXs
+
+
+def gpxWorker(task):
+    """Pool worker: one featuresToGPX with its own writer.  Errors are returned, not
+    raised, so one bad input does not stop the rest of the batch."""
+    inputFC, outGPX, pretty, split = task
+    try:
+        return featuresToGPX(inputFC, outGPX, pretty=pretty, split=split)
+    except Exception as e:
+        return {"input": inputFC, "output": outGPX, "files": [], "features": 0, "points": 0,
+                "bytes": 0, "seconds": 0.0, "error": str(e)}
+
+
+def batchFeaturesToGPX(inputs, outFolder, pretty=False, processes=None, reportFile=None, split=None):
+    """
+    featuresToGPX for many inputs, one GPX file (or, with split, one numbered set of
+    them) each in outFolder, fanned out over a pool of worker processes.  Returns the
+    per input stats (input, output, files, features, points, bytes, seconds and
+    error, if any), which are also added to the tool messages and, given a
+    reportFile, written to it as JSON.
+    """
+    startTime = time.time()
+    parseSplit(split)  # a bad split fails here rather than in every worker
+    inputFCs = expandInputs(inputs)
+    if not inputFCs:
+        arcpy.AddWarning("No input feature classes found.")
+        return []
+    if not os.path.isdir(outFolder):
+        os.makedirs(outFolder)
+    tasks = [[inputFC, outGPX, pretty, split] for inputFC, outGPX in zip(inputFCs, outputNames(inputFCs, outFolder))]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(tasks))
+    arcpy.AddMessage("Exporting {} inputs with {} processes...".format(len(tasks), processes))
+    if processes <= 1:
+        results = [gpxWorker(task) for task in tasks]
+    else:
+        pool = PoolHelper.makePool(processes)
+        try:
+            results = pool.map(gpxWorker, tasks, 1)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    for stats in results:
+        if "error" in stats:
+            arcpy.AddWarning("{}: {}".format(stats["input"], stats["error"]))
+        else:
+            arcpy.AddMessage("{input}: {features} features, {points} points, {bytes} bytes "
+                             "in {seconds:.1f} s".format(**stats))
+    totals = {"inputs": len(results),
+              "files": sum(len(stats["files"]) for stats in results),
+              "failed": sum(1 for stats in results if "error" in stats),
+              "features": sum(stats["features"] for stats in results),
+              "points": sum(stats["points"] for stats in results),
+              "bytes": sum(stats["bytes"] for stats in results),
+              "seconds": sum(stats["seconds"] for stats in results),
+              "elapsed": time.time() - startTime,
+              "processes": processes}
+    arcpy.AddMessage("Total: {inputs} inputs ({failed} failed) in {files} files, {features} features, {points} points, "
+                     "{bytes} bytes; {seconds:.1f} s of work in {elapsed:.1f} s".format(**totals))
+    if reportFile:
+        with open(reportFile, "w") as f:
+            json.dump({"files": results, "totals": totals}, f, indent=2)
+    return results
@@ -0,0 +1,616 @@
+"""
+PairWiseIntersectHelper.py
+The intersect, checkpoint and parallel code behind PairWiseIntersect.py, in a module
+of its own so the worker processes of a parallel run can import it.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import operator
+import tempfile
+import multiprocessing
+import arcpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import PoolHelper
+
+class GridIndex(object):
+    """
+    Uniform grid of feature envelopes, built once and queried with an
+    envelope.  Each item is stored in every cell its envelope touches;
+    items that would cover more than maxCells cells are kept in a short
+    list that every query checks instead.  Queries only look at the cells
+    that hold items, however large their envelope.
+    """
+    def __init__(self, envelopes, maxCells=64):
+        """envelopes - list of (xmin, ymin, xmax, ymax), one per item."""
+        self.envelopes = envelopes
+        self.cells = {}
+        self.large = []
+        self.rejected = 0 # candidates from the cells whose envelopes do not overlap
+        self.cellBounds = (0, 0, -1, -1) # lowest and highest cell numbers in use
+        if not envelopes:
+            self.cellSize = 1.0
+            self.xOrigin = self.yOrigin = 0.0
+            return
+        xmin = min(e[0] for e in envelopes)
+        ymin = min(e[1] for e in envelopes)
+        xmax = max(e[2] for e in envelopes)
+        ymax = max(e[3] for e in envelopes)
+        # Cells about the size of an average envelope, but no more cells
+        # than items for evenly spread small features (points).
+        avgSize = sum(max(e[2] - e[0], e[3] - e[1]) for e in envelopes) / len(envelopes)
+        spread = ((xmax - xmin) * (ymax - ymin) / len(envelopes)) ** 0.5
+        # Points or lines all along one line have no area, spread them along
+        # the extent instead; identical items all go in one cell whatever the size.
+        extent = max(xmax - xmin, ymax - ymin)
+        self.cellSize = max(avgSize, spread) or extent / len(envelopes) or 1.0
+        self.xOrigin = xmin
+        self.yOrigin = ymin
+        for item, env in enumerate(envelopes):
+            i0, j0, i1, j1 = self._cellRange(env)
+            if (i1 - i0 + 1) * (j1 - j0 + 1) > maxCells:
+                self.large.append(item)
+                continue
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self.cells.setdefault((i, j), []).append(item)
+        if self.cells:
+            iCells = [i for i, j in self.cells]
+            jCells = [j for i, j in self.cells]
+            self.cellBounds = (min(iCells), min(jCells), max(iCells), max(jCells))
+
+    def _cellRange(self, env):
+        """Cell numbers covered by an envelope."""
+        size = self.cellSize
+        return (int((env[0] - self.xOrigin) // size), int((env[1] - self.yOrigin) // size),
+                int((env[2] - self.xOrigin) // size), int((env[3] - self.yOrigin) // size))
+
+    def query(self, env):
+        """Items whose envelopes overlap env, in the order they were added."""
+        i0, j0, i1, j1 = self._cellRange(env)
+        bounds = self.cellBounds
+        i0, j0 = max(i0, bounds[0]), max(j0, bounds[1])
+        i1, j1 = min(i1, bounds[2]), min(j1, bounds[3])
+        found = set(self.large)
+        cells = self.cells
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            for (i, j), items in cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found.update(items)
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    found.update(cells.get((i, j), ()))
+        envelopes = self.envelopes
+        items = sorted(item for item in found
+                       if envelopes[item][0] <= env[2] and envelopes[item][2] >= env[0] and
+                          envelopes[item][1] <= env[3] and envelopes[item][3] >= env[1])
+        self.rejected += len(found) - len(items)
+        return items
+
+class PhaseTimer(object):
+    """
+    Wall time per phase of a run, plus the fan-out (output rows per layer1 feature).
+    Phases are timed by chaining the clock:  t = timer.add("intersect", t)
+    """
+    def __init__(self):
+        self.start = time.time()
+        self.phases = []   # phase names in the order first seen
+        self.totals = {}
+        self.fanouts = {}  # output rows per feature: number of features
+        self.features = 0
+
+    def now(self):
+        return time.time()
+
+    def add(self, phase, since):
+        """Add the time since since to phase and return the time now."""
+        now = time.time()
+        if phase not in self.totals:
+            self.phases.append(phase)
+            self.totals[phase] = 0.0
+        self.totals[phase] += now - since
+        return now
+
+    def feature(self, fanout):
+        """Count a layer1 feature that produced fanout output rows."""
+        self.features += 1
+        self.fanouts[fanout] = self.fanouts.get(fanout, 0) + 1
+
+    def histogram(self):
+        """Fan-out counts in bins 0, 1, 2, 3-4, 5-8, 9-16, ..."""
+        bins = {}
+        for fanout, count in self.fanouts.items():
+            if fanout <= 2:
+                lo = hi = fanout
+            else:
+                hi = 4
+                while hi < fanout:
+                    hi *= 2
+                lo = hi // 2 + 1
+            label = str(lo) if lo == hi else "{}-{}".format(lo, hi)
+            bins[(lo, label)] = bins.get((lo, label), 0) + count
+        return [[label, bins[(lo, label)]] for lo, label in sorted(bins)]
+
+    def report(self):
+        """The run as a dictionary, ready for json."""
+        elapsed = time.time() - self.start
+        return {"elapsed": elapsed,
+                "phases": [[phase, self.totals[phase]] for phase in self.phases],
+                "features": self.features,
+                "outputRows": sum(f * c for f, c in self.fanouts.items()),
+                "featuresPerSecond": self.features / elapsed if elapsed > 0 else None,
+                "fanout": self.histogram(),
+                "peakMemoryMB": peakMemoryMB()}
+
+    def addMessages(self):
+        """Write the report as tool messages."""
+        report = self.report()
+        elapsed = report["elapsed"]
+        arcpy.AddMessage("Time to process data = {:.1f} seconds; in minutes = {:.1f}".format(elapsed, elapsed / 60))
+        for phase, seconds in report["phases"]:
+            arcpy.AddMessage("  {:<12} {:10.2f} s {:6.1f}%".format(phase, seconds, 100.0 * seconds / elapsed if elapsed else 0.0))
+        arcpy.AddMessage("{} features, {} output rows, {:.1f} features per second".format(
+            report["features"], report["outputRows"], report["featuresPerSecond"] or 0.0))
+        arcpy.AddMessage("Output rows per feature: " +
+                         ", ".join("{}: {}".format(label, count) for label, count in report["fanout"]))
+        if report["peakMemoryMB"] is not None:
+            arcpy.AddMessage("Peak memory {:.0f} MB".format(report["peakMemoryMB"]))
+
+def peakMemoryMB():
+    """Peak memory of this process in MB, None where it cannot be found."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.PeakWorkingSetSize / 1048576.0
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            return peak / 1048576.0 # bytes
+        return peak / 1024.0 # kilobytes
+    except Exception:
+        return None
+
+def envelope(geometry):
+    """(xmin, ymin, xmax, ymax) of a geometry."""
+    extent = geometry.extent
+    return (extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+
+def envelopeWithin(inner, outer):
+    """True if envelope inner lies within envelope outer."""
+    return (inner[0] >= outer[0] and inner[1] >= outer[1] and
+            inner[2] <= outer[2] and inner[3] <= outer[3])
+
+def buildFieldMap(fldsOutput, fldsInput1, fldsInput2, fldsInput2Modified):
+    """
+    Resolve where each output field comes from, once, for rows assembled from
+    row + row2 + consts + (clippedFeature,).  Fields of the first input win,
+    then second input fields (renamed with _1 on a clash); anything else gets
+    its own name as the value, as before.
+    Returns a function that builds the output row from those values and the
+    tuple of constants.
+    """
+    n1 = len(fldsInput1)
+    n2 = len(fldsInput2)
+    consts = []
+    indices = []
+    for outFlds in fldsOutput:
+        if outFlds == "shape@":
+            indices.append(None) # the clipped feature, placed below
+            continue
+        if outFlds in fldsInput1[:-1]:
+            indices.append(fldsInput1.index(outFlds))
+            continue
+        k = None
+        if outFlds in fldsInput2 or outFlds in fldsInput2Modified:
+            for f, fldIn2 in enumerate(fldsInput2[:-1]):
+                if fldIn2 == outFlds or fldIn2 + "_1" == outFlds:
+                    k = n1 + f
+                    break
+        if k is None:
+            k = n1 + n2 + len(consts)
+            consts.append(outFlds)
+        indices.append(k)
+    clipped = n1 + n2 + len(consts)
+    indices = [clipped if k is None else k for k in indices]
+    if len(indices) == 1:
+        k = indices[0]
+        return (lambda values: (values[k],)), tuple(consts)
+    return operator.itemgetter(*indices), tuple(consts)
+
+def readCheckpoint(checkpointFile):
+    """The state saved by writeCheckpoint."""
+    with open(checkpointFile, "r") as f:
+        return json.load(f)
+
+def writeCheckpoint(checkpointFile, state):
+    """Save state as JSON, replacing the file only once the new one is complete."""
+    tempFile = checkpointFile + ".tmp"
+    with open(tempFile, "w") as f:
+        json.dump(state, f)
+    if os.path.exists(checkpointFile):
+        os.remove(checkpointFile)
+    os.rename(tempFile, checkpointFile)
+
+def truncateOutput(outputFC, rowCount):
+    """
+    Delete the rows of outputFC after the first rowCount, in OID order; those were
+    written after the last checkpoint.  Returns the number deleted.
+    """
+    with arcpy.da.SearchCursor(outputFC, ["OID@"]) as cursor:
+        oids = sorted(row[0] for row in cursor)
+    if len(oids) < rowCount:
+        raise ValueError("{} has {} rows, fewer than the {} in the checkpoint".format(
+            outputFC, len(oids), rowCount))
+    extra = set(oids[rowCount:])
+    if extra:
+        with arcpy.da.UpdateCursor(outputFC, ["OID@"]) as cursor:
+            for row in cursor:
+                if row[0] in extra:
+                    cursor.deleteRow()
+    return len(extra)
+
+def inDatabase(inputFC):
+    """
+    True if inputFC is in a geodatabase, where cursors honour ORDER BY; shapefiles and
+    other file formats ignore it.
+    """
+    workspace = os.path.dirname(arcpy.Describe(inputFC).catalogPath)
+    while arcpy.Describe(workspace).dataType == "FeatureDataset":
+        workspace = os.path.dirname(workspace)
+    return arcpy.Describe(workspace).workspaceType in ("LocalDatabase", "RemoteDatabase")
+
+def insertRows(outputFC, fields, rows):
+    """
+    Write rows to outputFC with an insert cursor opened for them alone, and released
+    before returning so they are committed.  Returns the number written.
+    """
+    if not rows:
+        return 0
+    inCursor = arcpy.da.InsertCursor(outputFC, fields)
+    try:
+        for row in rows:
+            inCursor.insertRow(row)
+    finally:
+        del inCursor
+    return len(rows)
+
+def pairWiseIntersect(inputFC1, inputFC2, outputFC, fldList2Transfer, whereClause=None,
+                      bufferSize=5000, checkpointFile=None, resume=False, checkpointEvery=1000, reportFile=None,
+                      layer2Cache=None):
+    """
+    Intersect each feature in layer1 with the features it overlaps in layer2.
+    whereClause - optional query limiting the features of layer1 that are processed.
+    bufferSize - output rows are held in memory and written bufferSize at a time, each
+                 batch with an insert cursor of its own, so the writes come in bursts
+                 rather than between the reads of layer1.
+    checkpointFile - optional JSON file; every checkpointEvery layer1 features the rows
+                     held are written and the last layer1 OID and output row count saved.
+    resume - carry on from checkpointFile: rows written after the checkpoint are deleted
+             and layer1 features up to its OID are skipped.  Layer1 is read in OID order,
+             ORDER BY on its OID field; outside a geodatabase that is not certain, and
+             a checkpointed run warns about it.
+    reportFile - optional JSON file for the PhaseTimer report, which is also added to the
+                 messages.
+    layer2Cache - optional dictionary that keeps layer2's rows and index between runs
+                  with the same layer2 and fields, instead of reading them again.
+    """
+    if resume and not checkpointFile:
+        arcpy.AddError("Resume needs the checkpoint file of the run to carry on.")
+        return
+    if resume and not os.path.exists(checkpointFile):
+        arcpy.AddError("Checkpoint file {} not found, there is no run to resume.".format(checkpointFile))
+        return
+    if checkpointFile and not inDatabase(inputFC1):
+        arcpy.AddWarning("{} is not in a geodatabase, so it may not be read in OID order; a resumed "
+                         "run assumes it is, and could skip or repeat features.".format(inputFC1))
+    timer = PhaseTimer()
+    t = timer.now()
+    # Pick up where a checkpointed run stopped
+    startRows = 0
+    if resume:
+        state = readCheckpoint(checkpointFile)
+        if state.get("complete"):
+            arcpy.AddMessage("{} is already complete".format(outputFC))
+            return
+        deleted = truncateOutput(outputFC, state["rows"])
+        startRows = state["rows"]
+        oidFld = arcpy.AddFieldDelimiters(inputFC1, arcpy.Describe(inputFC1).oidFieldName)
+        resumeClause = "{} > {}".format(oidFld, state["lastOID"])
+        if whereClause:
+            whereClause = "({}) AND {}".format(whereClause, resumeClause)
+        else:
+            whereClause = resumeClause
+        arcpy.AddMessage("Resuming after OID {} with {} rows ({} later rows removed)".format(
+            state["lastOID"], startRows, deleted))
+
+    # Prep for processing
+    # Determine if the inputs are layers or featureclass
+    if whereClause:
+        inputLayer1 = arcpy.MakeFeatureLayer_management(inputFC1,"inputLayer1",whereClause)
+    elif arcpy.Describe(inputFC1).datasetType == "FeatureClass":
+        inputLayer1 = arcpy.MakeFeatureLayer_management(inputFC1,"inputLayer1")
+    else:
+        inputLayer1 = inputFC1
+
+    if arcpy.Describe(inputFC2).datasetType == "FeatureClass":
+        inputLayer2 = arcpy.MakeFeatureLayer_management(inputFC2,"inputLayer2")
+    else:
+        inputLayer2 = inputFC2
+
+    # Get the input geometry type for use in the geometry intersect method
+    layer1Type = arcpy.Describe(inputLayer1).shapeType
+    layer2Type = arcpy.Describe(inputLayer2).shapeType
+    if layer1Type == "Point" or layer2Type == "Point":
+        dimension = 1
+    elif layer1Type == "Polyline" or layer2Type == "Polyline":
+        dimension = 2
+    else:
+        dimension = 4
+
+    arcpy.AddMessage(time.ctime())
+
+    # Setup input fields
+    tempFldsInput1 = [f.name.upper() for f in arcpy.ListFields(inputLayer1)]
+    fldsInput1 = list(tempFldsInput1)
+    fldsInput1.remove(arcpy.Describe(inputLayer1).shapeFieldName.upper())
+    oidName1 = arcpy.Describe(inputLayer1).oidFieldName
+    fldsInput1.remove(oidName1.upper())
+    fldsInput1.append("OID@") # for the checkpoints, matches no output field
+    fldsInput1.append("shape@")
+
+    fldsInput2Orig = arcpy.ListFields(inputLayer2)
+    fldsInput2 = fldList2Transfer.upper().split(";")
+    try:
+        fldsInput2.remove("") #Take care of case where no fields were selected
+    except Exception:
+        pass
+    try:
+        fldsInput2.remove(arcpy.Describe(inputLayer2).shapeFieldName.upper())
+    except Exception:
+        pass # Shapefile was not in the input list
+    try:
+        fldsInput2.remove(arcpy.Describe(inputLayer2).oidFieldName.upper())
+    except Exception:
+        pass # OID was not in the input list
+    fldsInput2.append("shape@")
+
+    # Setup the output feature class for receiving spatial data from the intersect operation
+    # and attribute data from both the inputs.  A resumed run appends to it.
+    if not resume:
+        arcpy.CreateFeatureclass_management(os.path.dirname(outputFC),
+                                            os.path.basename(outputFC),
+                                            layer1Type,
+                                            inputLayer1,
+                                            spatial_reference=inputLayer1)
+    arcpy.MakeFeatureLayer_management(outputFC, r"outputLayer")
+    
+    fldsInput2Modified = []
+    for fld in fldsInput2:
+        if fld == "shape@":
+            pass
+        else:
+            for fldOrig in fldsInput2Orig:
+                if fldOrig.name.upper() == fld:
+                    if fld in fldsInput1:
+                        newFld = fld + "_1"
+                        fldsInput2Modified.append(newFld)
+                    else:
+                        newFld = fld
+                    if not resume:
+                        arcpy.AddField_management(r"outputLayer", newFld, fldOrig.type)
+                    break
+
+    tempFldsOutput = [f.name.upper() for f in arcpy.ListFields(r"outputLayer")]
+    fldsOutput = list(tempFldsOutput)
+    fldsOutput.remove(arcpy.Describe(r"outputLayer").shapeFieldName.upper())
+    fldsOutput.remove(arcpy.Describe(r"outputLayer").oidFieldName.upper())
+    fldsOutput.append("shape@")
+
+    t = timer.add("setup", t)
+
+    # Make sure to only process features in input1 that intersect something in input2.
+    arcpy.SelectLayerByLocation_management(inputLayer1, "INTERSECT", inputLayer2)
+    t = timer.add("selection", t)
+
+    # Read the second input once; its rows, geometries included, are kept in memory
+    # and found through a grid index of their envelopes.
+    if layer2Cache and layer2Cache["fields"] == fldsInput2:
+        rows2, envelopes2, index2 = layer2Cache["rows2"], layer2Cache["envelopes2"], layer2Cache["index2"]
+        index2.rejected = 0
+    else:
+        arcpy.AddMessage("Indexing intersecting features...")
+        with arcpy.da.SearchCursor(inputLayer2, fldsInput2) as cursor2:
+            rows2 = [row2 for row2 in cursor2]
+        envelopes2 = [envelope(row2[-1]) for row2 in rows2]
+        index2 = GridIndex(envelopes2)
+        if layer2Cache is not None:
+            layer2Cache.update({"fields": fldsInput2, "rows2": rows2,
+                                "envelopes2": envelopes2, "index2": index2})
+    disjointSkips = 0
+    containedSkips = 0
+    t = timer.add("index", t)
+
+    # Intersect each input feature with the features from the second input feature class and
+    # determine the field values to be transfered to the output
+    getOutputRow, consts = buildFieldMap(fldsOutput, fldsInput1, fldsInput2, fldsInput2Modified)
+    arcpy.AddMessage("Processing features...")
+    outRows = []
+    rowCount = 0 # rows written, the held rows are not counted until they are
+    t = timer.add("setup", t)
+    orderBy = (None, "ORDER BY " + arcpy.AddFieldDelimiters(inputLayer1, oidName1))
+    with arcpy.da.SearchCursor(inputLayer1, fldsInput1, sql_clause=orderBy) as cursor:
+        for cnter, row in enumerate(cursor, 1):
+            t = timer.add("read", t)
+            if cnter%250 == 0:
+                arcpy.AddMessage("{} Features processed... (skipped: {} envelope, {} disjoint; {} contained)".format(
+                    str(cnter), index2.rejected, disjointSkips, containedSkips))
+            # Candidates overlap the envelope; skip those that do not touch the feature.
+            # A feature inside a layer2 feature is its own intersection.
+            env1 = envelope(row[-1])
+            candidates = index2.query(env1)
+            t = timer.add("candidates", t)
+            fanout = 0
+            for k in candidates:
+                row2 = rows2[k]
+                if envelopeWithin(env1, envelopes2[k]) and row2[-1].contains(row[-1]):
+                    containedSkips += 1
+                    clippedFeature = row[-1]
+                elif row2[-1].disjoint(row[-1]):
+                    disjointSkips += 1
+                    t = timer.add("intersect", t)
+                    continue
+                else:
+                    clippedFeature = row2[-1].intersect(row[-1], dimension)
+                t = timer.add("intersect", t)
+                outRow = getOutputRow(row + row2 + consts + (clippedFeature,))
+                t = timer.add("attributes", t)
+                outRows.append(outRow)
+                fanout += 1
+            timer.feature(fanout)
+            if len(outRows) >= bufferSize:
+                rowCount += insertRows(r"outputLayer", fldsOutput, outRows)
+                outRows = []
+                t = timer.add("insert", t)
+            if checkpointFile and cnter%checkpointEvery == 0:
+                rowCount += insertRows(r"outputLayer", fldsOutput, outRows)
+                outRows = []
+                t = timer.add("insert", t)
+                writeCheckpoint(checkpointFile, {"lastOID": row[-2],
+                                                 "rows": startRows + rowCount})
+                t = timer.add("checkpoint", t)
+    rowCount += insertRows(r"outputLayer", fldsOutput, outRows)
+    t = timer.add("insert", t)
+    try:
+        del cursor
+    except:
+        pass
+    if checkpointFile:
+        writeCheckpoint(checkpointFile, {"lastOID": None,
+                                         "rows": startRows + rowCount,
+                                         "complete": True})
+    arcpy.AddMessage("Skipped: {} envelope, {} disjoint; {} contained".format(
+        index2.rejected, disjointSkips, containedSkips))
+
+    timer.addMessages()
+    if reportFile:
+        with open(reportFile, "w") as f:
+            json.dump(timer.report(), f, indent=2)
+    
+def datasetAndQuery(inputFC, scratchGDB, name):
+    """
+    The dataset behind a layer or featureclass and the query that limits it, so a
+    worker process can rebuild the layer.  A layer with a selection is copied to
+    scratchGDB as name, once, rather than sending its OIDs to every worker as a query
+    that could run past the database's length limit.
+    """
+    desc = arcpy.Describe(inputFC)
+    dataset = desc.catalogPath
+    if getattr(desc, "dataType", "") not in ("FeatureLayer", "Layer"):
+        return dataset, ""
+    if desc.FIDSet:
+        if not arcpy.Exists(scratchGDB):
+            arcpy.CreateFileGDB_management(os.path.dirname(scratchGDB), os.path.basename(scratchGDB))
+        selection = os.path.join(scratchGDB, name)
+        arcpy.CopyFeatures_management(inputFC, selection) # the selected features only
+        return selection, ""
+    if desc.definitionQuery:
+        return dataset, "({})".format(desc.definitionQuery)
+    return dataset, ""
+
+def oidChunks(dataset, query, chunks):
+    """
+    Where clauses splitting the features of dataset that match query into about
+    chunks runs of consecutive OIDs with the same number of features, in OID order.
+    """
+    oidFld = arcpy.AddFieldDelimiters(dataset, arcpy.Describe(dataset).oidFieldName)
+    with arcpy.da.SearchCursor(dataset, ["OID@"], query or None) as cursor:
+        oids = sorted(row[0] for row in cursor)
+    size = max(1, -(-len(oids) // chunks))
+    clauses = []
+    for start in range(0, len(oids), size):
+        clause = "{0} >= {1} AND {0} <= {2}".format(oidFld, oids[start], oids[min(start + size, len(oids)) - 1])
+        if query:
+            clause = query + " AND " + clause
+        clauses.append(clause)
+    return clauses
+
+layer2Caches = {} # (dataset2, where2, fldList2Transfer): layer2Cache, per worker process
+
+def intersectChunk(task):
+    """
+    Worker for parallelPairWiseIntersect, task is
+    [chunk number, dataset1, where1, dataset2, where2, fldList2Transfer, scratchFolder].
+    Writes to a file geodatabase of its own, one per worker process, and returns the output.
+    Layer2 is read by the first chunk a worker gets and kept for the chunks after it.
+    """
+    k, dataset1, where1, dataset2, where2, fldList2Transfer, scratchFolder = task
+    arcpy.env.overwriteOutput = True
+    scratchGDB = os.path.join(scratchFolder, "worker_{}.gdb".format(os.getpid()))
+    if not arcpy.Exists(scratchGDB):
+        arcpy.CreateFileGDB_management(scratchFolder, os.path.basename(scratchGDB))
+    inputFC2 = dataset2
+    if where2:
+        inputFC2 = arcpy.MakeFeatureLayer_management(dataset2, "workerLayer2", where2)
+    chunkFC = os.path.join(scratchGDB, "chunk_{}".format(k))
+    layer2Cache = layer2Caches.setdefault((dataset2, where2, fldList2Transfer), {})
+    pairWiseIntersect(dataset1, inputFC2, chunkFC, fldList2Transfer, where1, layer2Cache=layer2Cache)
+    return chunkFC
+
+def parallelPairWiseIntersect(inputFC1, inputFC2, outputFC, fldList2Transfer, processes=None,
+                              checkpointFile=None, resume=False, reportFile=None):
+    """
+    pairWiseIntersect split by OID into chunks of layer1 that are intersected by a pool
+    of worker processes, each reading the inputs with its own cursors.  The chunk outputs
+    are merged in OID order, so the output matches the serial run.  Each layer1 feature
+    is in exactly one chunk, so there is nothing to dedupe.  Every worker process holds
+    all of layer2 in memory, read once for its first chunk.
+    checkpointFile, resume, reportFile - passed on when the run falls back to a serial
+    one; a parallel run does not checkpoint or report and warns that they are ignored.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    clauses = []
+    if processes > 1:
+        scratchFolder = tempfile.mkdtemp(prefix="pairwise_", dir=arcpy.env.scratchFolder or None)
+        scratchGDB = os.path.join(scratchFolder, "selections.gdb")
+        dataset1, query1 = datasetAndQuery(inputFC1, scratchGDB, "selection1")
+        dataset2, query2 = datasetAndQuery(inputFC2, scratchGDB, "selection2")
+        clauses = oidChunks(dataset1, query1, processes * 4)
+        if len(clauses) <= 1:
+            shutil.rmtree(scratchFolder, ignore_errors=True)
+    if len(clauses) <= 1:
+        pairWiseIntersect(inputFC1, inputFC2, outputFC, fldList2Transfer, checkpointFile=checkpointFile,
+                          resume=resume, reportFile=reportFile)
+        return
+    if checkpointFile or resume or reportFile:
+        arcpy.AddWarning("Checkpoint, resume and report files are only used by serial runs, "
+                         "they are ignored with {} processes".format(processes))
+    tasks = [[k, dataset1, clause, dataset2, query2, fldList2Transfer, scratchFolder]
+             for k, clause in enumerate(clauses)]
+    arcpy.AddMessage("Processing {} chunks with {} processes...".format(len(tasks), processes))
+    pool = PoolHelper.makePool(processes)
+    try:
+        chunkFCs = pool.map(intersectChunk, tasks, 1)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    arcpy.AddMessage("Merging chunks...")
+    arcpy.Merge_management(chunkFCs, outputFC)
+    shutil.rmtree(scratchFolder, ignore_errors=True)
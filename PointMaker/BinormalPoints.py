@@ -8,7 +8,7 @@ Authors
 Created  Aug 18, 2008
 Updates  June 2013
 
-Requires:  random, math, py_gp_methods, PointMaker
+Requires:  math, py_gp_methods, PointMaker
 
 Notes:
   random is used to generate random numbers, check the random module
@@ -16,6 +16,10 @@ Notes:
   floating point number between 0 and 1 is created.  If you want numbers
   within a specific range, then you can use uniform( a, b) where N is the
   number generated within the range defined by a and b.
+  The shape centers, sizes and angles come from PointMaker.run_rng, so
+  the seed reported by a run repeats it when given as the optional
+  argument 11.  The Generate Points.tbx tool does not pass a seed, so
+  a run is only repeated from the command line or Python.
 
   function  points created
 
@@ -26,124 +30,137 @@ Notes:
 #-----------------------------------------------------------------------------
 #Main
 #
-import os, sys, string, math, random
+import os, sys, string, math
 import PointMaker as PM
 import py_gp_methods as py_gp
 #
-import arcpy
-#
-arcpy.overwriteOutput = True
-#
-#inputs
-#
-binomCent = sys.argv[1]      #center
-Xstd = sys.argv[2]           #stand. dev of X
-Ystd = sys.argv[3]           #stand. dev of Y
-Rho = sys.argv[4]            #correlation coefficient
-n = int(sys.argv[5])         #number of points
-numShapes = int(sys.argv[6]) #number of shapes to create
-outFC = sys.argv[7]          #output shapefile
-outCSV = sys.argv[8]
-arcpy.Extent = sys.argv[9]      #output extent
-outToScreen = sys.argv[10]   #output results to screen
-#
-#checks
-#
-#center check
-try:
-  aPair = string.split(binomCent," ")
-  Xcent = float(aPair[0]); Ycent = float(aPair[1])
-  arcpy.AddMessage("\n" + "Shapes centered at " + str(aPair))
-  binomCent = "fixed"
-except:
-  arcpy.AddMessage("\n" + "Shapes centered randomly within dataframe extent")
-  binomCent = "random"
-#
-#  Stats check
-binorm_stat = False
-binorm_rho = False
-try:
-  Xstd = float(Xstd); Ystd = float(Ystd)
-except:
-  binorm_stat = True
-  arcpy.AddMessage("Binormal distribution will be created using random stats")
-try:
-  Rho = float(Rho)
-  if (Rho > 1.0) or (Rho < -1.0):
-    msg = "Correlation coefficient needs to be between -1.0 and 1.0"
-    arcpy.AddMessage("\n" + msg)
-    sys.exit()  
-except:
-  binorm_rho = True
-  arcpy.AddMessage("Binormal distribution will be created using random correlation")
-#    
-#  n and numshapes check              
-try:
-  n = abs(int(n)); numShapes = abs((numShapes))
-  if (n == 0) or (numShapes == 0):
-    arcpy.AddMessage("No shapes created and/or points per shape is zero")
+if __name__ == "__main__":
+  import arcpy   #not at the top, the pool workers import this script
+  #
+  arcpy.overwriteOutput = True
+  #
+  #inputs
+  #
+  binomCent = sys.argv[1]      #center
+  Xstd = sys.argv[2]           #stand. dev of X
+  Ystd = sys.argv[3]           #stand. dev of Y
+  Rho = sys.argv[4]            #correlation coefficient
+  n = int(sys.argv[5])         #number of points
+  numShapes = int(sys.argv[6]) #number of shapes to create
+  outFC = sys.argv[7]          #output shapefile
+  outCSV = sys.argv[8]
+  arcpy.Extent = sys.argv[9]      #output extent
+  outToScreen = sys.argv[10]   #output results to screen
+  seed = sys.argv[11] if len(sys.argv) > 11 else "#"   #optional run seed
+  #
+  #the shape parameters are drawn from the run seed as well as the points,
+  #so the reported seed repeats the run
+  try:
+    seed = PM.get_seed(seed)
+  except ValueError:
+    arcpy.AddMessage("Invalid seed entry, use a whole number >= 0")
     sys.exit()
-except:
-  arcpy.AddMessage("Improper entry for number of features or points per feature")
-  sys.exit()
-#
-#  Extent check
-#
-L, R, B, T = py_gp.gp_extent(arcpy)  # get the extent if any
-#
-#output check
-#
-if (outFC == "#") and (outCSV == "#"):
-  outToScreen = "true"
-  aMsg = "\n" + "No shapefile or csv file created..." + \
-         "so output is directed to screen"
-  arcpy.AddMessage(aMsg)
-#
-#end checks
-#
-if outFC != "#":
-  outFC = outFC.replace("\\","/")
-  fullName = os.path.split(outFC)
-  outFolder = fullName[0].replace("\\", "/")
-  shapeClass = "Point"
-#
-#collect the points
-#
-outPnts = []
-for i in range(numShapes):
-  if (binomCent == "random"):
-    if numShapes > 1: 
-      Xcent = random.uniform(L,R); Ycent = random.uniform(B,T)
-    else:
-      Xcent = L + ((R-L)/2.0); Ycent = B + ((T-B)/2.0)
-  if binorm_stat == True:
-    bin_max = (R - L) * 0.05  #max is 5%  of width
-    bin_min = (R - L) * 0.001 #min is 0.1% of width
-    Xstd = random.uniform(bin_min, bin_max)
-    Ystd = Xstd * random.random()
-  if (binorm_rho == True):
-    Rho = random.uniform(-1.0, 1.0)
-  #
-  #generate the points
-  #
-  pnts = PM.binormal(n, Xcent, Ycent, Xstd, Ystd, Rho)
-  #
-  outPnts.append(pnts)
-#
-#optional shapefile creation
-if outFC != "#":
-  fieldsToAdd = [["Group", "LONG", "9", "#"],
-                 ["X", "DOUBLE", 16, 7],
-                 ["Y", "DOUBLE", 16, 7]]
-  py_gp.createPointFile (outFC, shapeClass, "#", outPnts, fieldsToAdd, arcpy)
-  arcpy.AddMessage("\n" + "You can join the original table to " \
-                + "this shapefile table if you want other attributes." + "\n")
-#
-#optional csv file creation or output to screen
-if outCSV != "#":
-  PM.to_CSV(outCSV, outPnts)
-#
-if outToScreen == "true":
-  py_gp.print_pnts(outPnts, arcpy)
-  
-  
+  rng = PM.run_rng(seed)
+  #
+  #checks
+  #
+  #center check
+  try:
+    aPair = string.split(binomCent," ")
+    Xcent = float(aPair[0]); Ycent = float(aPair[1])
+    arcpy.AddMessage("\n" + "Shapes centered at " + str(aPair))
+    binomCent = "fixed"
+  except:
+    arcpy.AddMessage("\n" + "Shapes centered randomly within dataframe extent")
+    binomCent = "random"
+  #
+  #  Stats check
+  binorm_stat = False
+  binorm_rho = False
+  try:
+    Xstd = float(Xstd); Ystd = float(Ystd)
+  except:
+    binorm_stat = True
+    arcpy.AddMessage("Binormal distribution will be created using random stats")
+  try:
+    Rho = float(Rho)
+    if (Rho > 1.0) or (Rho < -1.0):
+      msg = "Correlation coefficient needs to be between -1.0 and 1.0"
+      arcpy.AddMessage("\n" + msg)
+      sys.exit()  
+  except:
+    binorm_rho = True
+    arcpy.AddMessage("Binormal distribution will be created using random correlation")
+  #    
+  #  n and numshapes check              
+  try:
+    n = abs(int(n)); numShapes = abs((numShapes))
+    if (n == 0) or (numShapes == 0):
+      arcpy.AddMessage("No shapes created and/or points per shape is zero")
+      sys.exit()
+  except:
+    arcpy.AddMessage("Improper entry for number of features or points per feature")
+    sys.exit()
+  #
+  #  Extent check
+  #
+  L, R, B, T = py_gp.gp_extent(arcpy)  # get the extent if any
+  #
+  #output check
+  #
+  if (outFC == "#") and (outCSV == "#"):
+    outToScreen = "true"
+    aMsg = "\n" + "No shapefile or csv file created..." + \
+           "so output is directed to screen"
+    arcpy.AddMessage(aMsg)
+  #
+  #end checks
+  #
+  if outFC != "#":
+    outFC = outFC.replace("\\","/")
+    fullName = os.path.split(outFC)
+    outFolder = fullName[0].replace("\\", "/")
+    shapeClass = "Point"
+  #
+  #collect the points
+  #
+  shapes = []
+  for i in range(numShapes):
+    if (binomCent == "random"):
+      if numShapes > 1: 
+        Xcent = rng.uniform(L,R); Ycent = rng.uniform(B,T)
+      else:
+        Xcent = L + ((R-L)/2.0); Ycent = B + ((T-B)/2.0)
+    if binorm_stat == True:
+      bin_max = (R - L) * 0.05  #max is 5%  of width
+      bin_min = (R - L) * 0.001 #min is 0.1% of width
+      Xstd = rng.uniform(bin_min, bin_max)
+      Ystd = Xstd * rng.random_sample()
+    if (binorm_rho == True):
+      Rho = rng.uniform(-1.0, 1.0)
+    #
+    #generate the points
+    #
+    shapes.append([PM.binormal_array, [n, Xcent, Ycent, Xstd, Ystd, Rho]])
+  #
+  #the shapes are divided among worker processes, see PM.make_shapes
+  arcpy.AddMessage("\n" + "Random seed " + str(seed))
+  outPnts = PM.make_shapes(shapes, seed)
+  if (outFC != "#") or (outToScreen == "true"):
+    outPnts = list(outPnts)   #used more than once
+  #
+  #optional shapefile creation
+  if outFC != "#":
+    fieldsToAdd = [["Group", "LONG", "9", "#"],
+                   ["X", "DOUBLE", 16, 7],
+                   ["Y", "DOUBLE", 16, 7]]
+    py_gp.createPointFile (outFC, shapeClass, "#", outPnts, fieldsToAdd, arcpy)
+    arcpy.AddMessage("\n" + "You can join the original table to " \
+                  + "this shapefile table if you want other attributes." + "\n")
+  #
+  #optional csv/binary point file creation or output to screen
+  if outCSV != "#":
+    PM.write_points(outCSV, outPnts)
+  #
+  if outToScreen == "true":
+    py_gp.print_pnts(outPnts, arcpy)
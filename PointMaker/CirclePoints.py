@@ -8,7 +8,7 @@ Authors
 Created  Aug 18, 2008
 Modified June 2013
 
-Requires:  random, math, py_gp_methods, PointMaker
+Requires:  math, py_gp_methods, PointMaker
 
 Notes:
   random is used to generate random numbers, check the random module
@@ -16,6 +16,10 @@ Notes:
   floating point number between 0 and 1 is created.  If you want numbers
   within a specific range, then you can use uniform( a, b) where N is the
   number generated within the range defined by a and b.
+  The shape centers, sizes and angles come from PointMaker.run_rng, so
+  the seed reported by a run repeats it when given as the optional
+  argument 10.  The Generate Points.tbx tool does not pass a seed, so
+  a run is only repeated from the command line or Python.
 
   function  points created
 
@@ -26,110 +30,125 @@ Notes:
 #-----------------------------------------------------------------------------
 #Main
 #
-import os, sys, string, math, random
+import os, sys, string, math
 import PointMaker as PM
 import py_gp_methods as py_gp
-import arcpy
-
-arcpy.overwriteOutput = True
-#
-#inputs
-theType = string.split(sys.argv[1]," ")[0]
-circCent = sys.argv[2]
-radius = sys.argv[3]
-n = sys.argv[4]              #number of points
-numShapes = sys.argv[5]      #number of shapes to create
-outFC = sys.argv[6]          #output shapefile
-outCSV = sys.argv[7]
-arcpy.Extent = sys.argv[8]      #output extent
-outToScreen = sys.argv[9]    #output results to screen
-#
-#checks
 #
-try:  #center check
-  aPair = string.split(circCent," ")
-  Xcent = float(aPair[0]); Ycent = float(aPair[1])
-  arcpy.AddMessage("\n" + "Shapes centered at " + str(aPair))
-  circCent = "fixed"
-except:
-  arcpy.AddMessage("\n" + "Shapes centered randomly within dataframe extent")
-  circCent = "random"
-#
-try:  #radius check
-  radius = float(radius)
-  if radius == 0.0:
-    arcpy.AddMessage("A zero radius is not permitted")
+if __name__ == "__main__":
+  import arcpy   #not at the top, the pool workers import this script
+
+  arcpy.overwriteOutput = True
+  #
+  #inputs
+  theType = string.split(sys.argv[1]," ")[0]
+  circCent = sys.argv[2]
+  radius = sys.argv[3]
+  n = sys.argv[4]              #number of points
+  numShapes = sys.argv[5]      #number of shapes to create
+  outFC = sys.argv[6]          #output shapefile
+  outCSV = sys.argv[7]
+  arcpy.Extent = sys.argv[8]      #output extent
+  outToScreen = sys.argv[9]    #output results to screen
+  seed = sys.argv[10] if len(sys.argv) > 10 else "#"   #optional run seed
+  #
+  #the shape parameters are drawn from the run seed as well as the points,
+  #so the reported seed repeats the run
+  try:
+    seed = PM.get_seed(seed)
+  except ValueError:
+    arcpy.AddMessage("Invalid seed entry, use a whole number >= 0")
     sys.exit()
-  elif radius < 0.0:
-    arcpy.AddMessage("Random radii between 1 and 100 will be used")
-  else:
-    arcpy.AddMessage("Circles will be created using a radius of " + str(radius))
-except:
-  arcpy.AddMessage("Invalid radius entry")
-  sys.exit()
-#
-try:  #n and numshapes check
-  n = abs(int(n)); numShapes = abs(int(numShapes))
-  if (n == 0) or (numShapes == 0):
-    arcpy.AddMessage("No shapes created and/or points per shape is zero")
+  rng = PM.run_rng(seed)
+  #
+  #checks
+  #
+  try:  #center check
+    aPair = string.split(circCent," ")
+    Xcent = float(aPair[0]); Ycent = float(aPair[1])
+    arcpy.AddMessage("\n" + "Shapes centered at " + str(aPair))
+    circCent = "fixed"
+  except:
+    arcpy.AddMessage("\n" + "Shapes centered randomly within dataframe extent")
+    circCent = "random"
+  #
+  try:  #radius check
+    radius = float(radius)
+    if radius == 0.0:
+      arcpy.AddMessage("A zero radius is not permitted")
+      sys.exit()
+    elif radius < 0.0:
+      arcpy.AddMessage("Random radii between 1 and 100 will be used")
+    else:
+      arcpy.AddMessage("Circles will be created using a radius of " + str(radius))
+  except:
+    arcpy.AddMessage("Invalid radius entry")
     sys.exit()
-except:
-  arcpy.AddMessage("Improper entry for number of features or points per feature")
-  sys.exit()
-#
-# Extent check
-#
-L, R, B, T = py_gp.gp_extent(arcpy)  # get the extent if any
-#
-# output check
-#
-if (outFC == "#") and (outCSV == "#"):
-  outToScreen = "true"
-  aMsg = "\n" + "No shapefile or csv file created..." + \
-         "so output is directed to screen"
-  arcpy.AddMessage(aMsg)
-#
-#end checks
-#
-if outFC != "#":
-  outFC = outFC.replace("\\","/")
-  fullName = os.path.split(outFC)
-  outFolder = fullName[0].replace("\\", "/")
-  shapeClass = "Point"
-#
-#collect the points
-#
-outPnts = []
-for i in range(numShapes):
-  if (circCent == "random"):
-    if numShapes > 1: 
-      Xcent = random.uniform(L,R); Ycent = random.uniform(B,T)
+  #
+  try:  #n and numshapes check
+    n = abs(int(n)); numShapes = abs(int(numShapes))
+    if (n == 0) or (numShapes == 0):
+      arcpy.AddMessage("No shapes created and/or points per shape is zero")
+      sys.exit()
+  except:
+    arcpy.AddMessage("Improper entry for number of features or points per feature")
+    sys.exit()
+  #
+  # Extent check
+  #
+  L, R, B, T = py_gp.gp_extent(arcpy)  # get the extent if any
+  #
+  # output check
+  #
+  if (outFC == "#") and (outCSV == "#"):
+    outToScreen = "true"
+    aMsg = "\n" + "No shapefile or csv file created..." + \
+           "so output is directed to screen"
+    arcpy.AddMessage(aMsg)
+  #
+  #end checks
+  #
+  if outFC != "#":
+    outFC = outFC.replace("\\","/")
+    fullName = os.path.split(outFC)
+    outFolder = fullName[0].replace("\\", "/")
+    shapeClass = "Point"
+  #
+  #collect the points
+  #
+  shapes = []
+  for i in range(numShapes):
+    if (circCent == "random"):
+      if numShapes > 1: 
+        Xcent = rng.uniform(L,R); Ycent = rng.uniform(B,T)
+      else:
+        Xcent = L + ((R-L)/2.0); Ycent = B + ((T-B)/2.0)
+    #
+    #generate the points
+    if theType == "Random":
+      shapes.append([PM.circle_on_array, [n, Xcent, Ycent, radius, "True"]]) #random on
+    elif theType == "Within":
+      shapes.append([PM.circle_in_array, [n, Xcent, Ycent, radius]])    #random within
     else:
-      Xcent = L + ((R-L)/2.0); Ycent = B + ((T-B)/2.0)
-  #
-  #generate the points
-  if theType == "Random":
-    pnts = PM.circle_on(n, Xcent, Ycent, radius, "True") #random on
-  elif theType == "Within":
-    pnts = PM.circle_in(n, Xcent, Ycent, radius )    #random within
-  else:
-    pnts = PM.circle_on(n, Xcent, Ycent, radius, "False") #sequential on
-  outPnts.append(pnts)
-#
-#optional shapefile creation
-if outFC != "#":
-  fieldsToAdd = [["Group", "LONG", "9", "#"],
-                 ["X", "DOUBLE", 16, 7],
-                 ["Y", "DOUBLE", 16, 7]]
-  py_gp.createPointFile (outFC, shapeClass, "#", outPnts, fieldsToAdd, arcpy)
-  arcpy.AddMessage("\n" + "You can join the original table to " \
-                + "this shapefile table if you want other attributes." + "\n")
-#
-#optional csv file creation or output to screen
-if outCSV != "#":
-  PM.to_CSV(outCSV, outPnts)
-#
-if outToScreen == "true":
-  py_gp.print_pnts(outPnts, arcpy)
-  
-  
+      shapes.append([PM.circle_on_array, [n, Xcent, Ycent, radius, "False"]]) #sequential on
+  #
+  #the shapes are divided among worker processes, see PM.make_shapes
+  arcpy.AddMessage("\n" + "Random seed " + str(seed))
+  outPnts = PM.make_shapes(shapes, seed)
+  if (outFC != "#") or (outToScreen == "true"):
+    outPnts = list(outPnts)   #used more than once
+  #
+  #optional shapefile creation
+  if outFC != "#":
+    fieldsToAdd = [["Group", "LONG", "9", "#"],
+                   ["X", "DOUBLE", 16, 7],
+                   ["Y", "DOUBLE", 16, 7]]
+    py_gp.createPointFile (outFC, shapeClass, "#", outPnts, fieldsToAdd, arcpy)
+    arcpy.AddMessage("\n" + "You can join the original table to " \
+                  + "this shapefile table if you want other attributes." + "\n")
+  #
+  #optional csv/binary point file creation or output to screen
+  if outCSV != "#":
+    PM.write_points(outCSV, outPnts)
+  #
+  if outToScreen == "true":
+    py_gp.print_pnts(outPnts, arcpy)
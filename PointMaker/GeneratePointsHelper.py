@@ -7,7 +7,7 @@ Author
 Created  Aug 18, 2008
 Updates  Sept 2013
 
-Requires:  random, math
+Requires:  random, math, PointMaker (to_CSV only)
 
 Notes:
   Random is used to generate random numbers, check the random module
@@ -16,6 +16,9 @@ Notes:
   within a specific range, then you can use uniform( a, b) where N is the
   number generated within the range defined by a and b.
 
+  Every function takes an optional rng, see get_rng and shape_rng for
+  reproducible runs.
+
   function  points created
 
   onUC      on the circumference of the unit circle
@@ -28,7 +31,29 @@ Notes:
 
 import os, sys, math, random
 
-def onUC(n, radius, Xcent, Ycent ):
+def get_rng(rng=None):
+  '''rng (None, an integer seed or a random.Random instance)
+  returns the random number generator used by the point functions,
+  None uses the global generator in the random module
+  '''
+  if rng is None:
+    return random
+  elif isinstance(rng, (int, long)):
+    return random.Random(rng)
+  else:
+    return rng
+
+def shape_rng(seed, k):
+  '''seed (run seed), k (shape number)
+  random.Random instance for shape k of a run.  The stream depends only
+  on seed and k so a shape gets the same points however the shapes are
+  split between processes
+  '''
+  seed = int(seed); k = int(k)
+  assert (seed >= 0) and (k >= 0), "Seed error: seed and k must be >= 0"
+  return random.Random((seed << 64) | k)
+
+def onUC(n, radius, Xcent, Ycent, rng=None):
   '''n (no. points), radius, Xcent,Ycent (center point)
   random points on unit circle
   Bills notes:
@@ -37,18 +62,19 @@ def onUC(n, radius, Xcent, Ycent ):
     less than 1 (large chance for small n, chance decreases
     exponentially with large n.
   '''
+  rng = get_rng(rng)
   twoPI = math.pi*2.0
   pnts = []
   if radius < 0:
-    radius = random.uniform(1,100)
+    radius = rng.uniform(1,100)
   for i in range(n):
-    t = random.random() * twoPI
+    t = rng.random() * twoPI
     x = math.cos(t)*radius + Xcent;  y = math.sin(t)*radius + Ycent
     pnts.append([x,y])
   return pnts
 
 
-def inUC(n, radius, Xcent, Ycent):
+def inUC(n, radius, Xcent, Ycent, rng=None):
   '''n (no. points), radius, Xcent,Ycent (center point)
   uniform points within unit circle
   Bills notes:
@@ -57,16 +83,17 @@ def inUC(n, radius, Xcent, Ycent):
     close to pi.  Almost every MABE will have 5 support
     points
   '''
+  rng = get_rng(rng)
   twoPI = math.pi*2.0
   pnts = []
   for i in range(n):
-    t = random.random() * twoPI
-    r = radius * math.sqrt(random.random())
+    t = rng.random() * twoPI
+    r = radius * math.sqrt(rng.random())
     x = r * math.cos(t) + Xcent;  y = r * math.sin(t) + Ycent
     pnts.append([x,y])
   return pnts
 
-def inAnn(n, r1, r2, Xcent, Ycent):
+def inAnn(n, r1, r2, Xcent, Ycent, rng=None):
   '''n (no. points), inner and outer radii, Xcent,Ycent (center point)
   uniform points within annulus
   Bills notes:
@@ -75,24 +102,26 @@ def inAnn(n, r1, r2, Xcent, Ycent):
     close to pi.  Almost every MABE will have 5 support
     points
   '''
+  rng = get_rng(rng)
   twoPI = math.pi*2.0
   pnts = []
   for i in range(n):
-    t = random.random() * twoPI
-    r = random.uniform(r1,r2)
+    t = rng.random() * twoPI
+    r = rng.uniform(r1,r2)
     x = r * math.cos(t) + Xcent;  y = r * math.sin(t) + Ycent
     pnts.append([x,y])
   return pnts
 
-def binormal(n, Xcent, Ycent, Xstd, Ystd, Rho):
+def binormal(n, Xcent, Ycent, Xstd, Ystd, Rho, rng=None):
   '''n (no. points), Xcent,Ycent (center point), Xstd, Ystd (stand dev), Rho (corr coeff)
   points by binormal distribution (bivariate normal)
   '''
+  rng = get_rng(rng)
   twoPI = math.pi*2.0
   pnts = []
   for i in range(n):
-    t = 1.0 - random.random() * twoPI  #to ensure 0.0 is omitted 
-    r = math.sqrt(-2.0 * math.log(1.0 - random.random()))
+    t = 1.0 - rng.random() * twoPI  #to ensure 0.0 is omitted 
+    r = math.sqrt(-2.0 * math.log(1.0 - rng.random()))
     x = math.cos(t)
     z = math.sin(t)
     y = Rho * x + math.sqrt((1 - Rho) * (1 + Rho)) * z
@@ -102,26 +131,27 @@ def binormal(n, Xcent, Ycent, Xstd, Ystd, Rho):
   return pnts
 
 
-def onLine(n, length, u, v):
+def onLine(n, length, u, v, rng=None):
   '''n (no. of points), length, u, v (start and end points)
   generates random points along a line, the start and end
   points will be maintained
   '''
+  rng = get_rng(rng)
   twoPI = math.pi*2.0
   pnts = []
-  t = random.random() * math.pi     #no factor of 2
+  t = rng.random() * math.pi     #no factor of 2
   c = math.cos(t); s = math.sin(t)  #line slope
   pnts.append( [u - (length/2.0 * c), v - (length/2.0 * s)] ) # start
   pnts.append( [u + (length/2.0 * c), v + (length/2.0 * s)] ) # end
   halfLength = length/2.0
   for i in range(n-2):
-    L = random.uniform(-halfLength,halfLength)  #random floating point
+    L = rng.uniform(-halfLength,halfLength)  #random floating point
     x = L * c + u; y = L * s + v
     #x = (length * c) + u;  y = (length * s) + v
     pnts.append([x,y])
   return pnts
 
-def onEll(n, a, b, theta, Xcent, Ycent):
+def onEll(n, a, b, theta, Xcent, Ycent, rng=None):
   '''n (no. points), a, b (semi-major and minor axis, theta (rotation angle),
      Xcent,Ycent (center point)
   random points on ellipse
@@ -132,7 +162,7 @@ def onEll(n, a, b, theta, Xcent, Ycent):
   theta = math.radians(theta)
   cosT = math.cos(theta)
   sinT = math.sin(theta)
-  pnts = onUC(n, a, 0.0, 0.0)  #UC centered at 0,0 with a radius 
+  pnts = onUC(n, a, 0.0, 0.0, rng)  #UC centered at 0,0 with a radius 
   for i in range(len(pnts)):
     x = pnts[i][0]; y = pnts[i][1]
     t = math.atan2(y, x)
@@ -143,7 +173,7 @@ def onEll(n, a, b, theta, Xcent, Ycent):
     pnts[i] = [x,y]
   return pnts
 
-def inEll(n, a, b, theta, Xcent, Ycent):
+def inEll(n, a, b, theta, Xcent, Ycent, rng=None):
   '''n (no. points), a, b (semi-major and minor axis, theta (rotation angle),
      Xcent,Ycent (center point)
   Dans notes:
@@ -153,7 +183,7 @@ def inEll(n, a, b, theta, Xcent, Ycent):
   theta = math.radians(theta)
   cosT = math.cos(theta)
   sinT = math.sin(theta)
-  pnts = inUC(n, a, 0.0, 0.0)  #points within UC with radius a
+  pnts = inUC(n, a, 0.0, 0.0, rng)  #points within UC with radius a
   fact = math.sqrt((b*b)/(a*a))
   for i in range(len(pnts)):
     dx = pnts[i][0]
@@ -225,23 +255,16 @@ def createPointFile (outFC, outType, SR, pnts, fieldsToAdd, gp):
   del cur
 
 def to_CSV(outCSV, outPnts, gp):   
+  import PointMaker   #the CSV writer, imported here to keep numpy out of the other functions
   try:
-    csvFile = open(outCSV,'w')
+    csvFile = open(outCSV, 'w', PointMaker.CSV_BUFFER)
     csvFile.write("%25s %25s %10s %10s" % ("X", "Y", "ID", "Group"))
   except:
     gp.AddMessage("File opening error " + gp.GetMessages())
     sys.exit()
   #
-  shapeNum = 0
-  for pnts in outPnts:
-    aCount = 0
-    for pnt in pnts:
-      x = "%25.16f" % (pnt[0]); y = "%25.16f" % (pnt[1])
-      pntid = "%10i" % (aCount); shape = "%10i" % (shapeNum)
-      aLine = "\n" + x + "," + y + "," + pntid + "," + shape
-      csvFile.write(aLine)
-      aCount += 1
-    shapeNum += 1
+  PointMaker.write_CSV_rows(csvFile, outPnts, "\n%25.16f,%25.16f,%10i,%10i",
+                            ["X", "Y", "ID", "Group"])
   csvFile.flush()
   csvFile.close()
 
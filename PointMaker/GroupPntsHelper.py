@@ -5,16 +5,29 @@ Author
 
 Created  Aug, 2008
 Updates  June 2013 
+
+Notes:
+  groupPoints          points grouped by a field of a feature class
+  groupPointsFromFile  points grouped by the Group column of a point file
+                       written by PointMaker.to_BIN, or a raw file of
+                       float64 x,y values, using lazy memory-mapped views
 '''
+import os, sys
+import numpy as np
+import PointMaker
+
+RAW_EXTENSIONS = [".xy"]   #raw float64 x,y files
 
 def getPnts(rows):
   row = rows.next()
   pnts=[]
+  seen = set()    #X,Y pairs already in pnts
   while row:
     aShape = row.Shape
     pnt = aShape.GetPart()
     XY = [pnt.X, pnt.Y]    #get the X and Y
-    if XY not in pnts:
+    if (pnt.X, pnt.Y) not in seen:
+      seen.add((pnt.X, pnt.Y))
       pnts.append(XY)
     row = rows.next()
   return pnts
@@ -60,31 +73,34 @@ def groupPoints(inField, inFC, gp):
     del gp
     sys.exit()
   #  
-  #Determine unique values in the selected field
+  #Determine unique values in the selected field and collect the
+  #points for each in one pass, buckets[aVal] = [pnts, X,Y pairs seen]
   gp.AddMessage(inField + " is being queried for unique values." + "\n")
-  valueList = []
+  valueList = []   #unique values in the order found
+  buckets = {}
   rows = gp.SearchCursor(inFC)
   row = rows.next()
-  aString = ""
-  aLen = 0; aFac = 1
   while row:
     aVal = row.GetValue(inField)
-    if aVal not in valueList:
+    bucket = buckets.get(aVal)
+    if bucket is None:
+      bucket = [[], set()]
+      buckets[aVal] = bucket
       valueList.append(aVal)
-      aLen = len(aString)
-      if aLen > 50 * aFac:
-        aString = aString + "\n"
-        aFac = aFac + 1
-      aString = aString + " " + str(aVal)
+    pnt = row.Shape.GetPart()
+    XY = (pnt.X, pnt.Y)    #get the X and Y
+    if XY not in bucket[1]:
+      bucket[1].add(XY)
+      bucket[0].append([pnt.X, pnt.Y])
     row = rows.next()
-  #gp.AddMessage("Unique values: " + "\n" + aString)
   #
-  #Do the actual work of producing the unique shapefiles
+  #Do the actual work of producing the groups
   aMax = 1
   outVals = []  # a list to append valid output values
   for aVal in valueList:
     aMax = max(aMax,len(str(aVal)))
   for aVal in valueList:
+    pnts = buckets[aVal][0]
     if (str(aVal).isdigit()) and (not inType == "String"):
       fs = '"'+"%"+str(aMax)+"."+str(aMax)+'i"'
       aSuffix = fs % aVal
@@ -95,23 +111,75 @@ def groupPoints(inField, inFC, gp):
     else:
       aSuffix = str(aVal) 
       aVal = str(aVal)
-    try:
-      #Create a query and produce the file
-      if (not aVal.isdigit()) or (inType == "String"):
-        aVal = "'"+aVal+"'"
-      whereClause = "%s = %s" % (inField, aVal)
-      TempLayer = "TempLayer"
-      gp.MakeFeatureLayer_management(inFC, TempLayer, whereClause)
-      #
-      rowsNew = gp.SearchCursor("TempLayer")
-      pnts = getPnts(rowsNew)
-      if len(pnts) >= 3:   #need 3 valid points for a convex hull
-        groupedPoints.append(pnts)
-        outVals.append(aVal)
-    except:
-      gp.AddMessage("Could not create temporary layer" + "\n")
-      whereClause = "%s = %s" % (inField, aVal)
+    if (not aVal.isdigit()) or (inType == "String"):
+      aVal = "'"+aVal+"'"
+    if len(pnts) >= 3:   #need 3 valid points for a convex hull
+      groupedPoints.append(pnts)
+      outVals.append(aVal)
   del rows
-  del rowsNew
-  TempLayer = None
+  return [groupedPoints, inFieldInfo, outVals]
+#-----------------------------------------------------------------
+def isPointFile(inFile):
+  '''True if inFile is a binary or raw point file rather than a feature class'''
+  ext = os.path.splitext(inFile)[1].lower()
+  return ext in (PointMaker.BIN_EXTENSIONS + RAW_EXTENSIONS)
+
+def readPointFile(inFile, nCols=2):
+  '''memory maps a point file, nothing is read until it is used
+  inFile  binary point file (PointMaker.to_BIN) or a raw file of float64
+          values, nCols per point with x and y first
+  returns [xy, groups]
+    xy      (n, 2) float64 view of the x, y coordinates
+    groups  int32 view of the Group column, None for raw files
+  '''
+  aFile = open(inFile, 'rb')
+  try:
+    magic = aFile.read(len(PointMaker.BIN_MAGIC))
+  finally:
+    aFile.close()
+  if magic == PointMaker.BIN_MAGIC:
+    recs = PointMaker.read_BIN(inFile)
+    #X and Y are the first 16 bytes of each 24 byte record
+    xy = recs.view(np.float64).reshape(-1, 3)[:, :2]
+    return [xy, recs["Group"]]
+  raw = np.memmap(inFile, dtype=np.float64, mode='r')
+  assert len(raw) % nCols == 0, \
+         "Raw point file size is not a multiple of " + str(nCols) + " values"
+  return [raw.reshape(-1, nCols)[:, :2], None]
+
+def groupRanges(groups, blockSize=2**20):
+  '''start, stop and value of each run of equal values in groups,
+  scanned blockSize values at a time so only one block is in memory'''
+  ranges = []
+  n = len(groups)
+  start = 0
+  for b in range(0, n, blockSize):
+    block = np.asarray(groups[b:b + blockSize + 1])
+    for i in np.flatnonzero(block[1:] != block[:-1]):
+      stop = b + int(i) + 1
+      ranges.append([start, stop, int(groups[start])])
+      start = stop
+  if n > 0:
+    ranges.append([start, n, int(groups[start])])
+  return ranges
+
+def groupPointsFromFile(inFile, nCols=2):
+  '''file version of groupPoints, returns [groupedPoints, inFieldInfo, outVals]
+  groupedPoints are (m, 2) views into the memory-mapped file, one per
+  group of 3 or more points, and outVals the matching Group values.
+  Groups must be contiguous in the file, as written by to_BIN.  A raw
+  file is returned as a single group.
+  '''
+  xy, groups = readPointFile(inFile, nCols)
+  if groups is None:
+    ranges = [[0, len(xy), 0]]
+  else:
+    ranges = groupRanges(groups)
+  groupedPoints = []
+  outVals = []
+  for start, stop, aVal in ranges:
+    if stop - start >= 3:   #need 3 valid points for a convex hull
+      groupedPoints.append(xy[start:stop])
+      outVals.append(str(aVal))
+  inFieldInfo = ["Group", "Integer", 9, 0, 4]
   return [groupedPoints, inFieldInfo, outVals]
@@ -17,6 +17,10 @@
   #  NB: Repeated points are OK.
   #  Collinear points will cause M to be singular; computing a pseudo-inverse
   #  (with SVD) would probably solve this problem.
+  #  --> OptDesign fits points that lie in a lower dimensional subspace
+  #      (collinear in 2D, coplanar in 3D) in that subspace, see
+  #      subspaceBasis, and falls back to a pseudo-inverse if the
+  #      information matrix still cannot be factored.
   # 
   #  nDim enables this to handle higher dimensions!
   # 
@@ -34,13 +38,26 @@
   #  d(n)                  Implements Pronzato's optimization
   #  e, h                  Values in Pronzato's inequality
   #  maxX, xSum, xSumPlus
+  #
+  #  optDesignGroups fits many groups with a pool of worker processes.
+  #  Scripts that use it must keep their main code under
+  #  if __name__ == "__main__": (see PointMaker.make_shapes).
 #-------------------------------------------------------------
 #Main
 #
 #Imports
-import os, sys, string, math, time
+import os, sys, string, math, time, tempfile
+import multiprocessing
+import numpy as np
 from Py_Points import *
 import py_gp_methods
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import PoolHelper   #process pools shared with the other tools
+
+POOL_CHUNK = 50000       # small groups go to a worker about this many points at a time
+POOL_MAX = 2000000       # groups with more points than this are fit in this process
+STAND_BLOCK = 2**20      # points per block in standardizeArray
+FACTOR_REFRESH = 50      # OptDesign refactors the information matrix this often
 
 #-------------------------------------------------------------  
 def matrixMake(r,c,aVal):
@@ -89,6 +106,12 @@ def standardizePnts(pnts):
   #
   #--> (WAH added code to trap exceptions.)
   #
+  #  An (n, 2) array, eg. a memory-mapped view from
+  #  GroupPntsHelper.readPointFile, is standardized by
+  #  standardizeArray and pntsStand is returned as an (n, 2) array.
+  #
+  if isinstance(pnts, np.ndarray):
+    return standardizeArray(pnts)
   n = len(pnts)
   Xs, Ys = getXsYs(pnts)
   # Find the center (means).
@@ -148,147 +171,525 @@ def standardizePnts(pnts):
   return [pntsStand, Xavg, Yavg, Xstd, Ystd, rho, u, v]
 
   
-def OptDesign(v, nDim, MaxIter, Threshold):
+def standardizeArray(pnts, blockSize=STAND_BLOCK):
+  #
+  # standardizePnts for an (n, 2) array, blockSize points at a time
+  # so that only a block is copied into memory.  Returns the values of
+  # Py_Points.standardize_array, to rounding, with pntsStand an (n, 2)
+  # array.  pntsStand for a memory-mapped input is a temporary
+  # memory-mapped file as well.
+  #
+  n = len(pnts)
+  blocks = range(0, n, blockSize)
+  xSum = 0.0; ySum = 0.0
+  for i in blocks:
+    xSum += float(pnts[i:i + blockSize, 0].sum())
+    ySum += float(pnts[i:i + blockSize, 1].sum())
+  x_c = xSum / n; y_c = ySum / n
+  #
+  # Second pass for the SDs and the correlation coefficient.
+  sxx = 0.0; syy = 0.0; sxy = 0.0
+  for i in blocks:
+    dx = pnts[i:i + blockSize, 0] - x_c
+    dy = pnts[i:i + blockSize, 1] - y_c
+    sxx += float(np.dot(dx, dx)); syy += float(np.dot(dy, dy))
+    sxy += float(np.dot(dx, dy))
+  s_x = math.sqrt(sxx / n); s_y = math.sqrt(syy / n)
+  fx = s_x if s_x != 0.0 else 1.0   # unscaled when the SD is zero
+  fy = s_y if s_y != 0.0 else 1.0
+  rho = sxy / (fx * fy) / n
+  One = 1.0 - 10**-14   #see standardize_pnts
+  if abs(rho) >= One:
+    if rho < 0.0:
+      rho = -1.0
+    else:
+      rho = 1.0
+  if (rho > -1.0):
+    denomX = 1.0 / math.sqrt(2.0*(1.0 + rho))
+  else:
+    denomX = 1.0
+  if (rho < 1.0):
+    denomY = 1.0 / math.sqrt(2.0*(1.0 - rho))
+  else:
+    denomY = 1.0
+  #
+  # Third pass writes the standardized, rotated points.
+  if isinstance(pnts, np.memmap):
+    pntsStand = np.memmap(tempfile.TemporaryFile(), dtype=np.float64,
+                          mode="w+", shape=(n, 2))
+  else:
+    pntsStand = np.empty((n, 2))
+  uSum = 0.0; vSum = 0.0
+  for i in blocks:
+    dx = (pnts[i:i + blockSize, 0] - x_c) / fx
+    dy = (pnts[i:i + blockSize, 1] - y_c) / fy
+    out = pntsStand[i:i + blockSize]
+    out[:, 0] = (dx + dy) * denomX
+    out[:, 1] = (dx - dy) * denomY
+    uSum += float(out[:, 0].sum()); vSum += float(out[:, 1].sum())
+  return [pntsStand, x_c, y_c, s_x, s_y, rho, uSum / n, vSum / n]
+
+
+def OptDesign(v, nDim, MaxIter, Threshold, hull=False):
   #
-  # v          an array of points (x,y)
+  # v          points (x,y) or (n, nDim) array
   # nDim       number of dimensions
-  # n          number of points
-  # MaxIter    maximum number of iterations 
+  # MaxIter    maximum number of iterations
   # Threshold  termination threshold
+  # Returns ndx, mq, M, Lambda, IterNum, TimeMQ
   #
-  Zero = 10**-12           # Practically zero #--> See page 15
+  # The weights Lambda of the points u = [v; 1] are multiplied by
+  # their normalized variances u'Mu, where M is the inverse of the
+  # information matrix u'diag(Lambda)u, until the largest variance is
+  # within Threshold of nDim + 1.  Points whose variance falls below
+  # Pronzato's bound are removed from the active set, and following
+  # Harman and Pronzato only the weights of the points with variance
+  # above 1 are increased when they are renormalized.
+  #
+  # At the end M describes the MABE, the level set u'Mu = 1.  It is
+  # supported by the points in ndx[0:mq], most likely by those with
+  # the highest weights, whose variances are closest to 1.  ndx[mq:]
+  # holds the removed points, whose weights are zero.
+  #
+  # Each iteration works on the active points, u[ndx[0:mq]], as a
+  # block: M = u'diag(lambda)u and the variances u'Mu for all of
+  # them at once.  v can be a list of points or an (n, nDim) array,
+  # including a memory-mapped view from GroupPntsHelper.
+  #
+  # Any nDim >= 1 works, eg. 3 for x, y, z or 4 for x, y, z, t.  The
+  # information matrix is factored as L L' (Cholesky) and inv(L) gives
+  # both the variances, |inv(L) u|^2, and M.  Degenerate points are
+  # fitted in their subspace and M is mapped back to nDim + 1.
+  #
+  # The factor is kept between iterations.  With the active points
+  # whitened, z = inv(L) u, the next information matrix is L B L'
+  # where B = z'diag(lambda)z, so the next factor is L chol(B) and z
+  # is updated in place of u[ndx[0:mq]].  Every weight changes in an
+  # iteration, so B is not a low-rank change, but it tends to the
+  # identity as the weights converge.  L is refactored from u every
+  # FACTOR_REFRESH iterations to keep the round-off from building up.
+  #
+  # hull=True (2D only) runs the solver on the convex hull vertices,
+  # the only possible support points, and maps ndx back to v.  The
+  # points that are not on the hull follow the hull vertices in ndx,
+  # in index order, so ndx still lists all n points; their Lambda is
+  # zero.  The hull of a large array is found a block at a time (see
+  # hull_indices), so only the hull vertices of a memory-mapped v are
+  # read into memory, and its ndx and Lambda are temporary
+  # memory-mapped arrays.
+  #
+  if hull and (nDim == 2):
+    hullNdx = hull_indices(np.asarray(v, dtype=np.float64)[:, :2])
+    theReturned = OptDesign(np.asarray(v, dtype=np.float64)[hullNdx, :2],
+                            nDim, MaxIter, Threshold)
+    ndx, mq, M, Lambda, IterNum, TimeMQ = theReturned
+    n = len(v)
+    if isinstance(v, np.memmap):
+      weights = np.memmap(tempfile.TemporaryFile(), dtype=np.float64,
+                          mode="w+", shape=(n,))
+      weights[hullNdx] = Lambda
+      allNdx = np.memmap(tempfile.TemporaryFile(), dtype=np.int64,
+                         mode="w+", shape=(n,))
+    else:
+      weights = [0.0] * n
+      for i, aWeight in zip(hullNdx.tolist(), Lambda):
+        weights[i] = aWeight
+      allNdx = np.empty(n, dtype=np.int64)
+    k = len(ndx)
+    allNdx[:k] = hullNdx[ndx]
+    onHull = np.sort(hullNdx)
+    for i in range(0, n, HULL_BLOCK):   # the rest, a block at a time
+      rest = np.setdiff1d(np.arange(i, min(i + HULL_BLOCK, n)), onHull, True)
+      allNdx[k:k + len(rest)] = rest
+      k += len(rest)
+    if not isinstance(v, np.memmap):
+      allNdx = allNdx.tolist()
+    return allNdx, mq, M, weights, IterNum, TimeMQ
   Rho = 2.0                # Normalization factor >= 1
   n = len(v)
   #
   #   Create u = [v; 1] and indexes for the active points,
   #   ndx[].  Initialize the solution, lambda[].
   #
-  u = matrixMake(n, nDim + 1, 0.0)
-  d = matrixMake(n,1,0.0)
-  x = 1.0/n; ndx = [];  Lambda = []
-  for i in range(n):
-    for j in range(nDim):
-      u[i][j] = v[i][j]
-    u[i][nDim] = 1.0
-    ndx.append(i)
-    Lambda.append(x)
+  w, T = subspaceBasis(np.asarray(v, dtype=np.float64)[:, :nDim])
+  nDim = w.shape[1]          # dimension of the subspace
+  u = np.ones((n, nDim + 1))
+  u[:, :nDim] = w
+  del w
+  d = np.zeros(n)
+  ndx = np.arange(n)
+  Lambda = np.empty(n)
+  Lambda.fill(1.0/n)
   #
   mq = n      # Number of active points
-  # 
+  #
   #   Iteratively improve the solution.
   #
   IterNum = 0
   Start = time.clock()  # start time
   TimeMQ = [[IterNum, mq, 0.0]]
   #
+  z = None                   # whitened active points, inv(L) u[act]
   while IterNum <= MaxIter:
+    act = ndx[:mq]
     #
-    #   Compute the information matrix M.
+    #   Factor the information matrix, or update the factor, and
+    #   form the normalized inverse M and the variances from it.
     #
-    M = matrixMake(nDim+1, nDim+1, 0.0)
-    
-    for iq in range(mq):
-      i = ndx[iq]
-      for j in range(nDim+1):
-        for k in range(nDim+1):
-          M[j][k] = M[j][k] + Lambda[i]*u[i][j]*u[i][k]
-    # 
-    #   Invert it in place to obtain the asymptotic
-    #   variance-covariance matrix.  The last coefficient
-    #   normalizes the inverse.
-    #
-    M = inverseMatrix(M, nDim+1.0) #--> Note the normalization!
+    try:
+      if (z is None) or (IterNum % FACTOR_REFRESH == 0):
+        ua = u[act]
+        Linv = np.linalg.inv(np.linalg.cholesky(np.dot(ua.T * Lambda[act], ua)))
+        z = np.dot(ua, Linv.T)
+        del ua
+      else:
+        Cinv = np.linalg.inv(np.linalg.cholesky(np.dot(z.T * Lambda[act], z)))
+        z = np.dot(z, Cinv.T)
+        Linv = np.dot(Cinv, Linv)
+      x = (z * z).sum(axis=1) / (nDim + 1.0)
+      M = np.dot(Linv.T, Linv) / (nDim + 1.0) #--> Note the normalization!
+    except np.linalg.LinAlgError:
+      ua = u[act]
+      M = np.linalg.pinv(np.dot(ua.T * Lambda[act], ua)) / (nDim + 1.0)
+      x = (np.dot(ua, M) * ua).sum(axis=1)
+      z = None
+      del ua
     #
     #   Update the weights, lambda, which are normalized
-    #   variances.
-    # 
-    maxX = 1.0                    # Compute Pronzato's optimization
-    for iq in range(mq):
-      i = ndx[iq]
-      x = 0.0                     # The (normalized) variance at # i
-      for j in range(nDim+1):
-        for k in range(nDim+1):
-          x = x + u[i][j] * M[j][k] * u[i][k]
-      Lambda[i] = Lambda[i] * x
-      # 
-      #   Pronzato: track the largest value of the variance
-      #   and save it for thinning the active set.
-      # 
-      if x > maxX:
-        maxX = x
-      d[i] = x
+    #   variances, and track the largest (Pronzato).
+    #
+    Lambda[act] *= x
+    d[act] = x
+    maxX = max(1.0, x.max())
     e = (nDim + 1) * (maxX - 1.0)    # Always non-negative
     if e <= Threshold:
       # We satisfied the minimax criterion
       break
-      # 
-      #   Remove active points according to Pronzato's criterion.
-      # 
+    #
+    #   Remove active points according to Pronzato's criterion.
+    #
     h = (2.0 + e - math.sqrt(e * (4.0 + e - 4.0 / (nDim + 1)))) / 2.0
     h = h - 0.00000000000001  #h - 1.0 E-14
     #
-    needsNormalization = False
-    xSum = 0.0; xSumPlus = 0.0
+    remove = x < h
+    keep = ~remove
+    xSumPlus = Lambda[act][keep & (x > 1.0)].sum()
+    xSum = Lambda[act][keep & (x <= 1.0)].sum()
+    removed = np.flatnonzero(remove)
+    Lambda[act[removed]] = 0.0  # Permanently zero the weights
+    #
+    #   Swap the points out from the top down, the last active
+    #   point taking the place of each removed one, and z with it.
+    #   The removed points go after the active ones, so ndx[] always
+    #   lists all n points.
     #
-    for iq in range(mq-1,-1,-1): #= mq To 1 Step -1
-      i = ndx[iq]
-      if d[i] < h:          # Remove the point.
-        Lambda[i] = 0.0     # Permanently zero the weight
-        ndx[iq] = ndx[mq-1] # Swap this point out (#--> Note the index!)
-        mq = mq - 1         # Shrink the array
-        needsNormalization = True
-      else:                 #   Accumulate the weight.
-        if d[i] > 1.0:
-          xSumPlus = xSumPlus + Lambda[i]
-        else:
-          xSum = xSum + Lambda[i]
-    if needsNormalization:
-      # 
+    rows = np.arange(mq)
+    for iq in removed[::-1]:
+      ndx[iq], ndx[mq-1] = ndx[mq-1], ndx[iq]
+      rows[iq] = rows[mq-1]
+      mq = mq - 1
+    act = ndx[:mq]
+    if (z is not None) and (len(removed) > 0):
+      z = z[rows[:mq]]
+    if len(removed) > 0:
+      #
       #   Suggestion of Harman and Pronzato: increase only
       #   the weights for the points with variance exceeding
       #   the minimax value of nDim+1.
       #
       xSum = xSum + Rho * xSumPlus
-      for iq in range(mq):
-        i = ndx[iq]
-        if d[i] > 1.0: 
-          Lambda[i] = Lambda[i] * Rho / xSum
-        else:
-          Lambda[i] = Lambda[i] / xSum
-      needsNormalization = False
+      Lambda[act] = np.where(d[act] > 1.0, Lambda[act] * Rho, Lambda[act]) / xSum
     else:
-      # 
+      #
       #   Just force the weights to sum to unity
       #   without changing their relative sizes.
-      # 
+      #
       xSum = xSum + xSumPlus
-      for iq in range(mq): #= 1 To mq
-        i = ndx[iq]
-        Lambda[i] = Lambda[i] / xSum
+      Lambda[act] = Lambda[act] / xSum
     #
     #   Prepare to iterate.  Mark time
     #
     IterNum = IterNum + 1
     diffTime = time.clock() - Start
-    TimeMQ.append([IterNum, mq, diffTime]) #,"Normalizing"])
+    TimeMQ.append([IterNum, mq, diffTime])
+  #
+  if T is not None:          # u'(T'MT)u = 1 in the full dimension
+    M = np.dot(T.T, np.dot(M, T))
+  return ndx.tolist(), mq, M.tolist(), Lambda.tolist(), IterNum, TimeMQ
+
+def OptDesignBatch(groups, nDim, MaxIter, Threshold):
+  #
+  # OptDesign for many small groups at once.  Returns a list with the
+  # OptDesign return values for each group, in the order of groups.
+  #
+  # Groups are sorted into buckets of similar size and padded to a
+  # common size, (g, p, nDim+1) for u.  Each iteration updates every
+  # group of a bucket that has not converged: stacked information
+  # matrices and inverses, the variances, Pronzato thinning and the
+  # Harman-Pronzato reweighting, with masks for the active points.
+  # Converged groups are dropped from the arrays, and the active
+  # points are packed to the front once they fit in half the width.
+  #
+  # The support points and M agree with OptDesign, to rounding.
+  # ndx[0:mq] lists the support points in index order, followed by
+  # the points removed; TimeMQ times are for the whole bucket.
+  # Degenerate groups (eg. collinear points), and groups whose
+  # information matrix becomes singular part way, are passed to
+  # OptDesign.  Only np.einsum (NumPy 1.6) is used for the stacked
+  # products, and batchInverse for the inverses.
+  #
+  Rho = 2.0                # Normalization factor >= 1
+  nU = nDim + 1
+  results = [None] * len(groups)
+  sizes = [len(pnts) for pnts in groups]
+  buckets = {}             # padded size: group numbers
+  for i in range(len(groups)):
+    p = 8
+    while p < sizes[i]:
+      p = p * 2
+    buckets.setdefault(p, []).append(i)
+  for p in sorted(buckets):
+    members = buckets[p]
+    g = len(members)
+    #
+    #   Pack u = [v; 1], the initial weights and the point numbers,
+    #   padding has zero weight and is never active.
+    #
+    u = np.zeros((g, p, nU))
+    act = np.zeros((g, p), dtype=bool)
+    for k in range(g):
+      n = sizes[members[k]]
+      u[k, :n, :nDim] = np.asarray(groups[members[k]], dtype=np.float64)[:, :nDim]
+      u[k, :n, nDim] = 1.0
+      act[k, :n] = True
+    n = np.array([sizes[i] for i in members], dtype=np.float64)
+    la = act / n[:, None]
+    pos = np.tile(np.arange(p), (g, 1))
+    #
+    #   Groups whose information matrix is singular to start with
+    #   are done one at a time.
+    #
+    good = batchInverse(batchInformation(u, la))[1]
+    for k in np.flatnonzero(~good):
+      results[members[k]] = OptDesign(groups[members[k]], nDim, MaxIter, Threshold)
+    live = np.flatnonzero(good)
+    u = u[good]; la = la[good]; act = act[good]; pos = pos[good]
     #
-    #   (We could check whether the number of iterations has been
-    #   exceeded, but don't bother.)
-    # 
+    mqAll = np.array([sizes[i] for i in members])
+    mqHist = [mqAll.copy()]      # mq of every group, each iteration
+    timeHist = [0.0]
+    Start = time.clock()
+    it = 0
+    done = []                    # [k, active points, weights, M, IterNum]
+    while (len(live) > 0) and (it <= MaxIter):
+      M, ok = batchInverse(batchInformation(u, la))
+      if not ok.all():
+        #
+        #   Singular part way, start these groups again one at a time
+        for k in np.flatnonzero(~ok):
+          i = members[live[k]]
+          results[i] = OptDesign(groups[i], nDim, MaxIter, Threshold)
+        live = live[ok]; u = u[ok]; la = la[ok]; act = act[ok]
+        pos = pos[ok]; M = M[ok]
+        if len(live) == 0:
+          break
+      M = M / float(nU)   #--> Note the normalization!
+      x = np.zeros(la.shape)
+      for i in range(nU):     # u'Mu, a row of M at a time
+        x += np.einsum('gpj,gj->gp', u, M[:, i, :]) * u[:, :, i]
+      x[~act] = 0.0
+      la = la * x
+      maxX = np.maximum(1.0, x.max(axis=1))
+      e = nU * (maxX - 1.0)
+      more = e > Threshold
+      for k in np.flatnonzero(~more):
+        done.append([live[k], pos[k][act[k]], la[k][act[k]], M[k], it])
+      if not more.any():
+        break
+      #
+      #   Pronzato thinning and reweighting for the groups that
+      #   have not converged.
+      #
+      live = live[more]; u = u[more]; la = la[more]; x = x[more]
+      act = act[more]; pos = pos[more]; e = e[more]; M = M[more]
+      h = (2.0 + e - np.sqrt(e * (4.0 + e - 4.0 / nU))) / 2.0
+      h = h - 0.00000000000001  #h - 1.0 E-14
+      keep = act & (x >= h[:, None])
+      removed = (act & ~keep).any(axis=1)
+      xSumPlus = (la * (keep & (x > 1.0))).sum(axis=1)
+      xSum = (la * (keep & (x <= 1.0))).sum(axis=1)
+      xSum = np.where(removed, xSum + Rho * xSumPlus, xSum + xSumPlus)
+      factor = np.where(removed[:, None] & (x > 1.0), Rho, 1.0)
+      la = np.where(keep, la * factor / xSum[:, None], 0.0)
+      act = keep
+      mq = act.sum(axis=1)
+      mqAll[live] = mq
+      #
+      #   Pack the active points to the front and trim the width.
+      #
+      width = int(mq.max())
+      if width <= act.shape[1] // 2:
+        order = np.argsort(~act, axis=1, kind='mergesort')[:, :width]
+        rows = np.arange(len(live))[:, None]
+        u = u[rows, order]; la = la[rows, order]
+        act = act[rows, order]; pos = pos[rows, order]
+      it = it + 1
+      mqHist.append(mqAll.copy())
+      timeHist.append(time.clock() - Start)
+    #
+    #   Groups still going after MaxIter iterations
+    for k in range(len(live)):
+      done.append([live[k], pos[k][act[k]], la[k][act[k]], M[k], it])
+    #
+    for k, support, Lambda, M, IterNum in done:
+      nk = sizes[members[k]]
+      weights = np.zeros(nk)
+      weights[support] = Lambda
+      isSupport = np.zeros(nk, dtype=bool)
+      isSupport[support] = True
+      ndx = np.flatnonzero(isSupport).tolist()
+      mq = len(ndx)
+      ndx = ndx + np.flatnonzero(~isSupport).tolist()
+      TimeMQ = [[i, int(mqHist[i][k]), timeHist[i]] for i in range(IterNum + 1)]
+      results[members[k]] = [ndx, mq, M.tolist(), weights.tolist(),
+                             IterNum, TimeMQ]
+  return results
+
+def batchInformation(u, la):
   #
-  if IterNum < MaxIter:
-    NIter = IterNum
-  OptDesign = Lambda
-  
-  return ndx, mq, M, OptDesign, IterNum, TimeMQ #--> Note additional return values
-  # 
-  #   At this point, M contains an approximation to the MABE:
-  #   it is the level set u'Mu = 1.  The MABE is supported by
-  #   points in the set indexed by ndx[], most likely by those
-  #   having the highest values of the weights lambda[].  These
-  #   will also be the points for which the normalized variances
-  #   stored in d[] are closest to 1.
-  # 
+  # Stacked information matrices, u'diag(la)u for each u(g, p, k),
+  # an element at a time; this is much faster with np.einsum than a
+  # single product over the three axes.
+  #
+  k = u.shape[2]
+  w = u * la[:, :, None]
+  A = np.empty((u.shape[0], k, k))
+  for i in range(k):
+    for j in range(i, k):
+      A[:, i, j] = np.einsum('gp,gp->g', w[:, :, i], u[:, :, j])
+      A[:, j, i] = A[:, i, j]
+  return A
+
+def batchInverse(A, tol=10**-12):
+  #
+  # Inverses of a stack of symmetric positive definite matrices,
+  # A(g, k, k), by Gauss-Jordan elimination, which needs no pivoting
+  # for them.  Each step works on all g matrices at once.
+  # Returns [Ainv, ok], ok is False for the matrices with a pivot
+  # below tol times their largest diagonal value (singular, to
+  # rounding); their Ainv is not usable.
+  #
+  g, k = A.shape[0], A.shape[1]
+  diag = range(k)
+  B = np.zeros((g, k, 2 * k))
+  B[:, :, :k] = A
+  B[:, diag, [k + j for j in diag]] = 1.0
+  scale = np.abs(A[:, diag, diag]).max(axis=1)
+  ok = np.ones(g, dtype=bool)
+  for j in diag:
+    pivot = B[:, j, j]
+    bad = ~(pivot > tol * scale)
+    if bad.any():
+      ok &= ~bad
+      pivot = np.where(bad, 1.0, pivot)
+    row = B[:, j, :] / pivot[:, None]
+    B -= B[:, :, j].copy()[:, :, None] * row[:, None, :]  # row j becomes zero
+    B[:, j, :] = row
+  return [B[:, :, k:], ok]
+
+def groupWorker(task):
+  #
+  # Fits a chunk of groups for optDesignGroups,
+  # task is [groups, nDim, MaxIter, Threshold, hull]
+  #
+  groups, nDim, MaxIter, Threshold, hull = task
+  return [OptDesign(pnts, nDim, MaxIter, Threshold, hull) for pnts in groups]
+
+def optDesignGroups(groups, nDim, MaxIter, Threshold, processes=None,
+                    maxPoints=POOL_MAX, hull=False):
+  #
+  # Runs OptDesign on each group of points with a process pool and
+  # yields the results in the order of groups.
+  # groups     list of groups of points, as for OptDesign
+  # processes  number of worker processes, default is the cpu count,
+  #            1 fits the groups in this process
+  # maxPoints  groups larger than this are fit in this process, while
+  #            the workers go on with the rest, rather than being
+  #            copied to a worker
+  # hull       passed to OptDesign, True keeps large memory-mapped
+  #            groups out of memory
+  #
+  # Small groups are sent POOL_CHUNK points at a time.  Each fit is
+  # the same as a serial run; only the times in TimeMQ differ.
+  #
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  processes = min(processes, len(groups))
+  if processes <= 1:
+    for pnts in groups:
+      yield OptDesign(pnts, nDim, MaxIter, Threshold, hull)
+    return
+  #
+  # slots, in group order: [True, number of groups] for a chunk done
+  # by the pool, [False, group number] for a group done here
+  slots = []; tasks = []
+  chunk = []; chunkSize = 0
+  for i in range(len(groups)):
+    n = len(groups[i])
+    if n > maxPoints:
+      if chunk:
+        slots.append([True, len(chunk)])
+        tasks.append([chunk, nDim, MaxIter, Threshold, hull])
+        chunk = []; chunkSize = 0
+      slots.append([False, i])
+      continue
+    chunk.append(groups[i])
+    chunkSize = chunkSize + n
+    if chunkSize >= POOL_CHUNK:
+      slots.append([True, len(chunk)])
+      tasks.append([chunk, nDim, MaxIter, Threshold, hull])
+      chunk = []; chunkSize = 0
+  if chunk:
+    slots.append([True, len(chunk)])
+    tasks.append([chunk, nDim, MaxIter, Threshold, hull])
+  #
+  pool = PoolHelper.makePool(processes)
+  try:
+    results = pool.imap(groupWorker, tasks)
+    for byPool, i in slots:
+      if byPool:
+        for theReturned in results.next():
+          yield theReturned
+      else:
+        yield OptDesign(groups[i], nDim, MaxIter, Threshold, hull)
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+def subspaceBasis(v):
+  #
+  # Finds the affine subspace spanned by the points v(n, nDim) from
+  # the singular values of the centered points.
+  # Returns [w, T]
+  #   w   v when the points span nDim dimensions, otherwise w(n, r)
+  #       the coordinates of the points in the r dimensional subspace
+  #   T   None, or T(r+1, nDim+1) which maps [v; 1] to [w; 1]
+  #
+  n, nDim = v.shape
+  c = v.mean(axis=0)
+  s, Vt = np.linalg.svd(v - c, full_matrices=False)[1:]
+  tol = s.max() * max(n, nDim) * np.finfo(np.float64).eps
+  r = int((s > tol).sum())
+  assert r > 0, "OptDesign error:  all points are the same"
+  if r == nDim:
+    return [v, None]
+  B = Vt[:r]
+  T = np.zeros((r + 1, nDim + 1))
+  T[:r, :nDim] = B
+  T[:r, nDim] = -np.dot(B, c)
+  T[r, nDim] = 1.0
+  return [np.dot(v - c, B.T), T]
 
 def inverseMatrix(A, z):
   #
@@ -10,7 +10,8 @@ Author
 Created      Aug 2008
 Last update  June 2013
 
-Requires:  math, os, random, sys, Py_Points
+Requires:  itertools, math, multiprocessing, os, random, re, struct,
+           sys, numpy, Py_Points, PoolHelper (in the folder above)
 
 Notes:
   Random numbers:
@@ -19,9 +20,26 @@ Notes:
   If you want numbers within a specific range, then use
   uniform(a, b) where the number generated within the range defined
   by a and b.
+  Every function that uses random numbers takes an optional rng
+  argument, an integer seed or a NumPy RandomState (see get_rng).
+  Use shape_rng(seed, k) for shape k of a multi-shape run so that
+  the output is the same regardless of how the shapes are split
+  between processes, and draw the shape parameters (centers, sizes,
+  angles) from run_rng(seed) so that the seed repeats the whole run.
+  get_seed turns a tool's seed input into a run seed.
 
   Points:
   Points are created using the Point class within the Py_Points module.
+  Each function also has a batch version with an _array suffix
+  (eg. binormal_array) which generates all the points at once with
+  NumPy and returns a Py_Points.PointArray.  The functions below
+  convert that result to a list of Point objects.
+
+  Parallel:
+  make_shapes generates many shapes with a pool of worker processes.
+  Scripts that use it must keep their main code under
+  if __name__ == "__main__": since the workers import the calling
+  script on Windows.
 
   Options:
 
@@ -49,15 +67,29 @@ Notes:
   rect_cwh     random points within width and height around center
   rect_ext     random points within an extent
   to_csv       output to *.csv file format
+  to_BIN       output to a binary point file, read_BIN reads it back
+  write_points output to binary or *.csv format, based on the extension
 
   '''
 
 #imports
-import os, sys, math, random
+import os, sys, math, random, re, struct
+import itertools, multiprocessing
+import numpy as np
 from Py_Points import *
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import PoolHelper   #process pools shared with the other tools
 
 #constants
 twoPI = math.pi*2.0
+CSV_BLOCK = 50000       #points formatted per write in to_CSV
+CSV_BUFFER = 2**22      #file buffer size in bytes for to_CSV
+BIN_MAGIC = "PMPNTS01"  #binary point files, see to_BIN
+BIN_FORMAT = "<8sqii8x"
+BIN_HEADER = struct.calcsize(BIN_FORMAT)
+BIN_DTYPE = np.dtype([("X", "<f8"), ("Y", "<f8"),
+                      ("ID", "<i4"), ("Group", "<i4")])
+BIN_EXTENSIONS = [".pnts", ".bin"]
 
 def bool_test(value):
   '''a hack since some programs will only allow strings to
@@ -67,68 +99,173 @@ def bool_test(value):
   else:
     return False
   
-def annulus(n=10, x_c=0, y_c=0, inner=0.5, outer=1.0 ):
+def get_rng(rng=None):
+  '''returns the random number generator used by the point functions
+     rng  None, use the global NumPy generator (np.random)
+          an integer seed, a new RandomState is created from it
+          a RandomState, eg. from shape_rng, is used as is'''
+  if rng is None:
+    return np.random
+  elif isinstance(rng, (int, long)):
+    return np.random.RandomState(rng)
+  else:
+    return rng
+
+def shape_rng(seed, k):
+  '''RandomState for shape k of a run started with seed
+     The stream depends only on seed and k, so shape k gets the same
+     points however the shapes of a run are divided between processes,
+     and the streams of different shapes are independent of one another
+     (the MT19937 state is keyed on both numbers, see init_by_array).'''
+  seed = int(seed); k = int(k)
+  assert (seed >= 0) and (k >= 0), "Seed error: seed and k must be >= 0"
+  key = [seed & 0xffffffff, (seed >> 32) & 0xffffffff,
+         k & 0xffffffff, (k >> 32) & 0xffffffff]
+  return np.random.RandomState(key)
+
+def run_rng(seed):
+  '''RandomState for the shape parameters of a run started with seed
+     Centers, sizes and angles drawn from it, in shape order, are the
+     same for every run with the seed.  The key has a different length
+     from the shape_rng keys so the stream is not that of any shape.'''
+  seed = int(seed)
+  assert seed >= 0, "Seed error: seed must be >= 0"
+  return np.random.RandomState([seed & 0xffffffff, (seed >> 32) & 0xffffffff])
+
+def make_seed():
+  '''a new seed from the operating system, keep it to repeat a run'''
+  return random.SystemRandom().randint(0, 2**32 - 1)
+
+def get_seed(value=None):
+  '''run seed from a tool input, None, "" or "#" gets a new one from
+     make_seed, anything else must be an integer >= 0, ValueError if not'''
+  if value is None or str(value).strip() in ["", "#"]:
+    return make_seed()
+  try:
+    seed = int(str(value).strip())
+  except ValueError:
+    seed = -1
+  if seed < 0:
+    raise ValueError("Seed error: the seed must be a whole number >= 0, not " + repr(value))
+  return seed
+
+def annulus(n=10, x_c=0, y_c=0, inner=0.5, outer=1.0, rng=None):
+  '''in annulus: n random points, center, inner/outer radii'''
+  return annulus_array(n, x_c, y_c, inner, outer, rng).to_points()
+
+def binormal(n=10, x_c=0, y_c=0, s_x=1, s_y=1, rho=0, rng=None):
+  '''binormal distribution: center, std devs, correl coeff'''
+  return binormal_array(n, x_c, y_c, s_x, s_y, rho, rng).to_points()
+
+def circle_in(n=10, x_c=0, y_c=0, radius=1, rng=None):
+  '''in circle: n random points, center and radius'''
+  return circle_in_array(n, x_c, y_c, radius, rng).to_points()
+
+def circle_on(n=10, x_c=0, y_c=0, radius=1, rand=True, rng=None):
+  '''on circle: n random/uniform points, center, radius, random T/F'''
+  return circle_on_array(n, x_c, y_c, radius, rand, rng).to_points()
+
+def ellipse_annulus(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, a_inner=1.8, rng=None):
+  '''elliptical annulus: n random points, center, angle, a b axes, inner a
+     see ellipse_annulus_array
+   '''
+  return ellipse_annulus_array(n, x_c, y_c, theta, a, b, a_inner, rng).to_points()
+
+def ellipse_in(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, rng=None):
+  '''in ellipse: n random points, center, angle, axes'''
+  return ellipse_in_array(n, x_c, y_c, theta, a, b, rng).to_points()
+
+def ellipse_on(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, rand=True, rng=None):
+  '''on ellipse: n random/uniform points, angle, center axes, random T/F'''
+  arr = ellipse_on_array(n, x_c, y_c, theta, a, b, rand, rng)
+  pnts = arr.to_points()
+  for pnt, t in zip(pnts, arr.theta.tolist()):
+    pnt.theta = t   #store the angle with the point
+  return pnts
+
+def ellipse_oval(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2, rng=None):
+  '''elliptical annulus: n random points, center, angle, a b axes, thickness'''
+  return ellipse_oval_array(n, x_c, y_c, theta, a, b, thickness, rng).to_points()
+
+def ellipse_parallel(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2):
+  '''parallel to ellipse: n sequential points, center, angle, a b axes, thickness'''
+  return ellipse_parallel_array(n, x_c, y_c, theta, a, b, thickness).to_points()
+
+def grid_ext(L=-5.0, R=5.0, B=-5.0, T=5.0, cols=10, rows=10):
+  '''grid pattern, by rows and cols: within left, right, bottom, top, cols, rows'''
+  return grid_ext_array(L, R, B, T, cols, rows).to_points()
+
+def grid_rot(x_c=0.0, y_c=0.0, theta=0.0, cols=10, rows=10, dx=1.0, dy=1.0):
+  '''grid pattern, with rotation: center, angle, rows, cols, dx, dy'''
+  return grid_rot_array(x_c, y_c, theta, cols, rows, dx, dy).to_points()
+
+def line_about(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True, jitter=0.1, rng=None):
+  '''on line: n random/uniform points, angle, center, length, jitter'''
+  return line_about_array(n, x_c, y_c, theta, leng, rand, jitter, rng).to_points()
+  
+def line_on(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True, rng=None):
+  '''on line: n random/uniform points, center, angle, length, random T/F'''
+  return line_on_array(n, x_c, y_c, theta, leng, rand, rng).to_points()
+
+def rect_cwh(n=10, x_c=0.0, y_c=1.0, dx=1.0, dy=1.0, rng=None):
+  '''n random points in rectangle extent: center x-y, width, height'''
+  return rect_cwh_array(n, x_c, y_c, dx, dy, rng).to_points()
+
+def rect_ext(n=10, L=-1, R=1, B=-1, T=1, rng=None):
+  '''n random points in rectangle extent: left, right, bottom, top'''
+  return rect_ext_array(n, L, R, B, T, rng).to_points()
+
+#----------------------------------------------------------
+#Batch versions:  all random values for a shape are drawn in one
+#  call and the scale/rotate/translate steps are array operations.
+#  Each returns a PointArray.  rng is passed to get_rng.
+
+def annulus_array(n=10, x_c=0, y_c=0, inner=0.5, outer=1.0, rng=None):
   '''in annulus: n random points, center, inner/outer radii'''
   assert (outer > inner) and (outer > 0) and (inner > 0), \
          "Annulus error, ensure outer > inner > 0" 
-  pnts = []
-  for i in range(n):
-    theta = random.random() * twoPI
-    r = random.uniform(inner, outer)
-    x = r * math.cos(theta) + x_c
-    y = r * math.sin(theta) + y_c
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  t = rng.random_sample(n) * twoPI
+  r = rng.uniform(inner, outer, n)
+  return PointArray(r * np.cos(t) + x_c, r * np.sin(t) + y_c)
 
-def binormal(n=10, x_c=0, y_c=0, s_x=1, s_y=1, rho=0):
+def binormal_array(n=10, x_c=0, y_c=0, s_x=1, s_y=1, rho=0, rng=None):
   '''binormal distribution: center, std devs, correl coeff'''
   assert (rho >= -1.0) and (rho <= 1.0), \
          "Binormal error:  -1 <= rho <= 1.0"
   assert (s_x >= 0.0) and (s_y >= 0.0), \
          "Binormal error:  std deviations > 0.0 required"
-  pnts = []
   rhoPrime = math.sqrt((1 - rho) * (1 + rho))
-  for i in range(n):
-    theta = random.random() * twoPI
-    r = math.sqrt(-2.0 * math.log(1.0 - random.random()))
-    cosT = math.cos(theta)
-    sinT = math.sin(theta)
-    y = rho * cosT + rhoPrime * sinT
-    x = x_c + s_x * r * cosT
-    y = y_c + s_y * r * y
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  t = rng.random_sample(n) * twoPI
+  r = np.sqrt(-2.0 * np.log(1.0 - rng.random_sample(n)))
+  cosT = np.cos(t)
+  sinT = np.sin(t)
+  y = rho * cosT + rhoPrime * sinT
+  return PointArray(x_c + s_x * r * cosT, y_c + s_y * r * y)
 
-def circle_in(n=10, x_c=0, y_c=0, radius=1):
+def circle_in_array(n=10, x_c=0, y_c=0, radius=1, rng=None):
   '''in circle: n random points, center and radius'''
   assert radius > 0, "Circle error:  set radius > 0"
-  pnts = []
-  for i in range(n):
-    t = random.random() * twoPI
-    r = radius * math.sqrt(random.random())
-    x = r * math.cos(t) + x_c
-    y = r * math.sin(t) + y_c
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  t = rng.random_sample(n) * twoPI
+  r = radius * np.sqrt(rng.random_sample(n))
+  return PointArray(r * np.cos(t) + x_c, r * np.sin(t) + y_c)
 
-def circle_on(n=10, x_c=0, y_c=0, radius=1, rand=True):
+def circle_on_array(n=10, x_c=0, y_c=0, radius=1, rand=True, rng=None):
   '''on circle: n random/uniform points, center, radius, random T/F'''
   assert radius > 0, "Circle error:  set radius > 0"
   rand = bool_test(rand)
-  pnts = []
-  step = math.radians(360.0/n) #step for uniform
-  start = math.radians(180.0)  #start for uniform
-  for i in range(n):
-    if rand:     #random points on circle
-      t = random.random() * twoPI
-    else:        #uniform points on circle
-      t = start - (i * step)  #angle from 180 to -180
-    x = math.cos(t)*radius + x_c
-    y = math.sin(t)*radius + y_c
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  if rand:     #random points on circle
+    t = rng.random_sample(n) * twoPI
+  else:        #uniform points on circle, angle from 180 to -180
+    step = math.radians(360.0/n)
+    start = math.radians(180.0)
+    t = start - np.arange(n) * step
+  return PointArray(np.cos(t)*radius + x_c, np.sin(t)*radius + y_c)
 
-def ellipse_annulus(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, a_inner=1.8 ):
+def ellipse_annulus_array(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, a_inner=1.8, rng=None):
   '''elliptical annulus: n random points, center, angle, a b axes, inner a
      Make an annulus then scale and rotate it
      a, b are the semi-major and semi-minor axes of the outer ellipse.
@@ -138,272 +275,285 @@ def ellipse_annulus(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, a_inner=1.8 ):
    '''
   assert (a > a_inner > b > 0), "Ellipse error:  set a > a_inner > b > 0"
   a = float(a);  b = float(b); a_inner = float(a_inner)
-  theta = math.radians(theta)
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  #
-  pnts = annulus(n, 0.0, 0.0, a_inner, a)  #points within UC with radius a
-  #
-  fact = math.sqrt((b*b)/(a*a))
-  for i in range(len(pnts)):
-    dx = pnts[i].x
-    dy = pnts[i].y * fact
-    dist = math.hypot(dx, dy) 
-    t = math.atan2(dy, dx)
-    cosQ = dist * math.cos(t)
-    sinQ = dist * math.sin(t)
-    x = cosT * cosQ - sinT * sinQ + x_c
-    y = sinT * cosQ + cosT * sinQ + y_c
-    pnts[i] = Point(x,y)
-  return pnts
+  pnts = annulus_array(n, 0.0, 0.0, a_inner, a, rng)  #points within UC with radius a
+  return pnts.scale(1.0, b/a).rotate(theta).move(x_c, y_c)
 
-def ellipse_in(n=10, x_c=0, y_c=0, theta=0, a=2, b=1):
+def ellipse_in_array(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, rng=None):
   '''in ellipse: n random points, center, angle, axes'''
   #  Make a within-circle then scale and rotate it
   assert (a > 0) and (b > 0) and (a >= b), \
          "Ellipse error:  set a >= b > 0"
   a = float(a);  b = float(b)
-  theta = math.radians(theta)
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  #
-  pnts = circle_in(n, 0.0, 0.0, a )  #points within UC with radius a
-  #
-  fact = math.sqrt((b*b)/(a*a))
-  for i in range(len(pnts)):
-    dx = pnts[i].x
-    dy = pnts[i].y * fact
-    dist = math.hypot(dx, dy)
-    t = math.atan2(dy, dx)
-    cosQ = dist * math.cos(t)
-    sinQ = dist * math.sin(t)
-    x = cosT * cosQ - sinT * sinQ + x_c
-    y = sinT * cosQ + cosT * sinQ + y_c
-    pnts[i] = Point(x,y)
-  return pnts
+  pnts = circle_in_array(n, 0.0, 0.0, a, rng)  #points within UC with radius a
+  return pnts.scale(1.0, b/a).rotate(theta).move(x_c, y_c)
 
-def ellipse_on(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, rand=True):
-  '''on ellipse: n random/uniform points, angle, center axes, random T/F'''
+def ellipse_on_array(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, rand=True, rng=None):
+  '''on ellipse: n random/uniform points, angle, center axes, random T/F
+     the angle of each point is stored in the theta attribute'''
   #  Make a on-circle then scale, rotate and translate
   assert (a > 0) and (b > 0) and (a >= b), \
          "Ellipse error:  set a >= b > 0"
-  rand = bool_test(rand)
-  theta = math.radians(theta)
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  #
-  if rand:
-    pnts = circle_on(n, 0.0, 0.0, a, True)  #circle centered at 0,0 with a radius 
-  else:
-    pnts = circle_on(n, 0.0, 0.0, a, False)
-  #
-  for i in range(len(pnts)):
-    x = pnts[i].x; y = pnts[i].y
-    t = math.atan2(y, x)
-    a_cosQ = a * math.cos(t)
-    b_sinQ = b * math.sin(t)
-    x = cosT * a_cosQ - sinT * b_sinQ + x_c
-    y = sinT * a_cosQ + cosT * b_sinQ + y_c
-    pnt = Point(x,y)
-    pnt.theta = t   #store the angle with the point
-    pnts[i] = pnt
+  circ = circle_on_array(n, 0.0, 0.0, 1.0, rand, rng)  #unit circle at 0,0
+  t = np.arctan2(circ.y, circ.x)
+  pnts = PointArray(a * np.cos(t), b * np.sin(t))
+  pnts = pnts.rotate(theta).move(x_c, y_c)
+  pnts.theta = t   #store the angles with the points
   return pnts
 
-def ellipse_oval(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2):
+def ellipse_oval_array(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2, rng=None):
   '''elliptical annulus: n random points, center, angle, a b axes, thickness'''
   assert (a > b > 0), "Ellipse error:  set a > b > 0"
   a = float(a);  b = float(b);  thickness = float(thickness)
-  pnts = []
-  for i in range(n):
-    t = random.random() * twoPI
-    c = math.cos(t); s = math.sin(t)
-    angle = math.atan2(s,c)
-    d = random.uniform(0, thickness)
-    x = a * c + d * math.cos(angle)
-    y = b * s + d * math.sin(angle)
-    pnt = Point(x,y)
-    pnt = pnt.rotate(theta)
-    pnt = pnt.move(x_c, y_c)
-    pnts.append(pnt)
-  return pnts
+  rng = get_rng(rng)
+  t = rng.random_sample(n) * twoPI
+  d = rng.uniform(0, thickness, n)
+  c = np.cos(t); s = np.sin(t)
+  pnts = PointArray(a * c + d * c, b * s + d * s)
+  return pnts.rotate(theta).move(x_c, y_c)
 
-def ellipse_parallel(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2):
+def ellipse_parallel_array(n=10, x_c=0, y_c=0, theta=0, a=2, b=1, thickness=0.2):
   '''parallel to ellipse: n sequential points, center, angle, a b axes, thickness'''
   assert (a > b > 0), "Ellipse error:  set a > b > 0"
   a = float(a);  b = float(b);  thickness = float(thickness)
-  pnts = ellipse_on(n, 0.0, 0.0, 0.0, a, b, rand=False)
-  for i in range(len(pnts)):
-    p = pnts[i]
-    t = p.theta    #point angle stored with point in ellipse_on
-    c = math.cos(t); s = math.sin(t)
-    angle = math.atan2(s,c)
-    denom = math.sqrt(b*b * c*c + a*a * s*s)
-    x1 = p.x; y1 = p.y
-    if denom != 0.0:
-      x = (thickness / denom) * b * c + x1
-      y = (thickness / denom) * a * s + y1
-    pnt = Point(x,y)
-    pnt = pnt.rotate(theta)
-    pnt = pnt.move(x_c, y_c)
-    pnts[i] = pnt
-  return pnts
+  pnts = ellipse_on_array(n, 0.0, 0.0, 0.0, a, b, rand=False)
+  c = np.cos(pnts.theta); s = np.sin(pnts.theta)
+  fact = thickness / np.sqrt(b*b * c*c + a*a * s*s)
+  pnts = PointArray(fact * b * c + pnts.x, fact * a * s + pnts.y)
+  return pnts.rotate(theta).move(x_c, y_c)
 
-def grid_ext(L=-5.0, R=5.0, B=-5.0, T=5.0, cols=10, rows=10):
-  '''grid pattern, by rows and cols: within left, right, bottom, top, cols, rows'''
+def grid_ext_array(L=-5.0, R=5.0, B=-5.0, T=5.0, cols=10, rows=10):
+  '''grid pattern, by rows and cols: within left, right, bottom, top, cols, rows
+     rows are created from bottom to top'''
   assert (L < R) and (B < T), \
          "Grid_ext error: check your L, R, B, and T values"
   assert rows > 1 and cols > 1, \
          "Grid_ext error: cols and rows > 1"
-  from decimal import Decimal
-  pnts = []
-  dx = Decimal(str(R - L)) / Decimal(str(cols - 1))
-  dy = Decimal(str(T - B)) / Decimal(str(rows - 1))
-  L = str(L)
-  B = str(B)  #use for bottom to top
-  #T = str(T) #use for top to bottom
-  for r in range(rows):
-    r = Decimal(str(r))
-    for c in range(cols):
-      c = Decimal(str(c))
-      x = (Decimal(L) + Decimal(c) * dx)
-      y = (Decimal(B) + Decimal(r) * dy)  #bottom to top
-      #y = (Decimal(T) - Decimal(r) * dy)  #top to bottom
-      pnts.append(Point(x,y))
-  return pnts 
+  L = float(L);  B = float(B)
+  xs = L + (float(R) - L) * np.arange(cols) / (cols - 1)
+  ys = B + (float(T) - B) * np.arange(rows) / (rows - 1)
+  return PointArray(np.tile(xs, rows), np.repeat(ys, cols))
 
-def grid_rot(x_c=0.0, y_c=0.0, theta=0.0, cols=10, rows=10, dx=1.0, dy=1.0):
+def grid_rot_array(x_c=0.0, y_c=0.0, theta=0.0, cols=10, rows=10, dx=1.0, dy=1.0):
   '''grid pattern, with rotation: center, angle, rows, cols, dx, dy'''
   assert (dx > 0) and (dy > 0), \
          "Grid_rot error: set dx and dy > 0"
   assert rows > 1 and cols > 1, \
          "Grid_rot error: cols and rows > 1"
-  theta = math.radians(theta)
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  pnts = []
   x_s = (cols - 1) * dx / 2.0  #center the grid and set extent
   y_s = (rows - 1) * dy / 2.0
-  L = -x_s; R = x_s
-  B = -y_s; T = y_s
-  for r in range(rows):
-    for c in range(cols):
-      x = L + c * dx           #create the grid points
-      y = T - r * dy
-      x1 = (x * cosT - y * sinT) + x_c  #rotate, translate
-      y1 = (x * sinT + y * cosT) + y_c
-      pnts.append(Point(x1,y1))
-  return pnts 
-
-def line_about(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True, jitter=0.1):
+  xs = -x_s + np.arange(cols) * dx   #create the grid points
+  ys = y_s - np.arange(rows) * dy
+  pnts = PointArray(np.tile(xs, rows), np.repeat(ys, cols))
+  return pnts.rotate(theta).move(x_c, y_c)
+
+def line_about_array(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True, jitter=0.1, rng=None):
   '''on line: n random/uniform points, angle, center, length, jitter'''
   assert (leng > 0) and (jitter >= 0), \
          "Line_about error: set leng and jitter > 0"
   rand = bool_test(rand)
-  pnts = []
-  theta = math.radians(theta)
   start = -leng/2.0
   stop = leng/2.0
   step = (leng * 1.0)/n   #step for uniform
   if not rand:
     n = n + 1            #ensure start and end points are created
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  for i in range(n):
-    dy = random.uniform(-jitter, jitter)   #scatter about the line
-    if rand:
-      L = random.uniform(start, stop) #(random.random())
-    else:
-      L = start + (i * step)
-    if theta != 0.0:
-      #x = (L * cosT) + x_c         #original
-      #y = ((L + dy) * sinT) + y_c  #original
-      x = (L * cosT - dy * sinT) + x_c  #rotate, translate
-      y = (L * sinT + dy * cosT) + y_c
-    else:
-      x = L  + x_c
-      y = dy + y_c
-    pnts.append(Point(x,y))
-  return pnts
-  
-def line_on(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True):
+  rng = get_rng(rng)
+  dy = rng.uniform(-jitter, jitter, n)   #scatter about the line
+  if rand:
+    L = rng.uniform(start, stop, n)
+  else:
+    L = start + np.arange(n) * step
+  return PointArray(L, dy).rotate(theta).move(x_c, y_c)
+
+def line_on_array(n=10, x_c=0, y_c=0, theta=0, leng=1, rand=True, rng=None):
   '''on line: n random/uniform points, center, angle, length, random T/F'''
   assert (leng > 0), "Line_on error: set leng > 0"
   rand = bool_test(rand)
-  pnts = []
   theta = math.radians(theta)
   start = -leng/2.0
   stop = leng/2.0
   step = (leng * 1.0)/n   #step for uniform
   if not rand:
     n = n + 1            #ensure start and end points are created
-  cosT = math.cos(theta)
-  sinT = math.sin(theta)
-  for i in range(n):
-    if rand:
-      L = random.uniform(start, stop) #(random.random())
-    else:
-      L = start + (i * step)
-    x = (L * cosT) + x_c
-    y = (L * sinT) + y_c
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  if rand:
+    L = rng.uniform(start, stop, n)
+  else:
+    L = start + np.arange(n) * step
+  return PointArray(L * math.cos(theta) + x_c, L * math.sin(theta) + y_c)
 
-def rect_cwh(n=10, x_c=0.0, y_c=1.0, dx=1.0, dy=1.0):
+def rect_cwh_array(n=10, x_c=0.0, y_c=1.0, dx=1.0, dy=1.0, rng=None):
   '''n random points in rectangle extent: center x-y, width, height'''
-  pnts = []
   assert (dx > 0.0) and (dy > 0.0), \
          "Rect_cwh error: check your width and height"
-  L = x_c - dx/2.0; R = x_c + dx/2.0
-  B = y_c - dy/2.0; T = y_c + dy/2.0
-  for i in range(n):
-    x = L + dx * random.random()
-    y = B + dy * random.random()
-    pnts.append(Point(x,y))
-  return pnts
+  L = x_c - dx/2.0
+  B = y_c - dy/2.0
+  rng = get_rng(rng)
+  return PointArray(L + dx * rng.random_sample(n),
+                    B + dy * rng.random_sample(n))
 
-def rect_ext(n=10, L=-1, R=1, B=-1, T=1):
+def rect_ext_array(n=10, L=-1, R=1, B=-1, T=1, rng=None):
   '''n random points in rectangle extent: left, right, bottom, top'''
-  pnts = []
   assert (L < R) and (B < T), \
          "Rect_ext error: check your L, R, B, and T values"
   dx = (float(R) - float(L))
   dy = (float(T) - float(B))
-  print dx, dy
-  for i in range(n):
-    x = L + dx * random.random()
-    y = B + dy * random.random()
-    pnts.append(Point(x,y))
-  return pnts
+  rng = get_rng(rng)
+  return PointArray(L + dx * rng.random_sample(n),
+                    B + dy * rng.random_sample(n))
+
+#----------------------------------------------------------
+#Parallel generation of many shapes
+
+def shape_worker(task):
+  '''generates one shape for make_shapes, task is [k, seed, func, args]'''
+  k, seed, func, args = task
+  return func(*args, rng=shape_rng(seed, k))
+
+def make_shapes(shapes, seed=None, processes=None):
+  '''generate the points for a list of shapes with a process pool
+     shapes     [[func, args], ...] func is an _array function and args
+                its arguments without rng, eg.
+                [[circle_in_array, [100, 0.0, 0.0, 1.0]], ...]
+     seed       run seed, shape k uses shape_rng(seed, k) so the output
+                does not depend on the number of processes
+     processes  number of worker processes, default is the cpu count,
+                1 generates the shapes in this process
+  yields a PointArray for each shape, in the order of shapes'''
+  if seed is None:
+    seed = make_seed()
+  tasks = [[k, seed, shapes[k][0], shapes[k][1]] for k in range(len(shapes))]
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  processes = min(processes, len(tasks))
+  if processes <= 1:
+    for task in tasks:
+      yield shape_worker(task)
+    return
+  #
+  #contiguous blocks of shapes per task keep the transfer overhead low
+  chunk = max(1, len(tasks) // (processes * 4))
+  pool = PoolHelper.makePool(processes)
+  try:
+    for pnts in pool.imap(shape_worker, tasks, chunk):
+      yield pnts
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
 
 def to_CSV(outCSV, outPnts):
-  '''output location and filename, output points'''
+  '''output location and filename, output points
+     outPnts is a list of point groups (lists of Points or PointArrays)
+     or a generator of them, eg. make_shapes, written as they arrive'''
   try:
-    csvFile = open(outCSV,'w')
+    csvFile = open(outCSV, 'w', CSV_BUFFER)
     csvFile.write("%10s, %10s, %25s, %25s, %10s" % \
                   ("FID", "ID", "X", "Y", "Group"))
   except:
     print "File opening error "
     sys.exit()
   #
+  write_CSV_rows(csvFile, outPnts, "\n%10i, %10i, %25.16f, %25.16f, %10i",
+                 ["FID", "ID", "X", "Y", "Group"])
+  csvFile.flush()
+  csvFile.close()
+
+def write_CSV_rows(csvFile, outPnts, lineFmt, columns):
+  '''open file, point groups, line format, column names in line order
+     Columns are FID (running point number), ID (number within the
+     group), X, Y and Group.  Lines are formatted a block of CSV_BLOCK
+     points at a time with one string operation and written with one
+     write() call per block.  The Group value is formatted once per
+     group and placed in the line format.'''
+  fmts = re.findall(r"%[-+ #0-9.]*[a-zA-Z]", lineFmt)
+  literals = re.split(r"%[-+ #0-9.]*[a-zA-Z]", lineFmt)
+  valCols = [c for c in columns if c != "Group"]
   pnt_num = 0
   shapeNum = 0
   for pnts in outPnts:
-    aCount = 0
-    for pnt in pnts:
-      FID = "%10i" % (pnt_num)
-      x = "%25.16f" % (pnt.x)
-      y = "%25.16f" % (pnt.y)
-      pnt_id = "%10i" % (aCount)
-      shape = "%10i" % (shapeNum)
-      aLine = "\n" + FID + ", " + pnt_id + ", " + x + ", "\
-              + y + ", " + shape
-      csvFile.write(aLine)
-      pnt_num += 1
-      aCount += 1
+    n = len(pnts)
+    if n > 0:
+      Xs, Ys = get_xs_ys(pnts)
+      if isinstance(pnts, PointArray):
+        Xs = Xs.tolist(); Ys = Ys.tolist()
+      aLine = literals[0]
+      for i in range(len(columns)):
+        if columns[i] == "Group":
+          aLine += (fmts[i] % shapeNum).replace("%", "%%")
+        else:
+          aLine += fmts[i]
+        aLine += literals[i + 1]
+    for start in range(0, n, CSV_BLOCK):
+      stop = min(start + CSV_BLOCK, n)
+      cols = {"FID": xrange(pnt_num + start, pnt_num + stop),
+              "ID": xrange(start, stop),
+              "X": Xs[start:stop],
+              "Y": Ys[start:stop]}
+      vals = tuple(itertools.chain.from_iterable(
+                   itertools.izip(*[cols[c] for c in valCols])))
+      csvFile.write(aLine * (stop - start) % vals)
+    pnt_num += n
     shapeNum += 1
-  csvFile.flush()
-  csvFile.close()
 
+def to_BIN(outFile, outPnts):
+  '''output location and filename, output points (as for to_CSV)
+     Binary point file, little-endian:
+       header  BIN_HEADER bytes: magic "PMPNTS01", number of points
+               (int64), number of groups (int32), record size (int32)
+       records BIN_DTYPE, one per point: X, Y (float64), ID, Group (int32)
+     FID is the record number.  Records are written group by group as
+     they arrive and the counts are filled in at the end.'''
+  try:
+    binFile = open(outFile, 'wb')
+    binFile.write(struct.pack(BIN_FORMAT, BIN_MAGIC, 0, 0, BIN_DTYPE.itemsize))
+  except:
+    print "File opening error "
+    sys.exit()
+  #
+  pnt_num = 0
+  shapeNum = 0
+  for pnts in outPnts:
+    n = len(pnts)
+    if n > 0:
+      Xs, Ys = get_xs_ys(pnts)
+      recs = np.empty(n, dtype=BIN_DTYPE)
+      recs["X"] = Xs
+      recs["Y"] = Ys
+      recs["ID"] = np.arange(n)
+      recs["Group"] = shapeNum
+      recs.tofile(binFile)
+    pnt_num += n
+    shapeNum += 1
+  binFile.seek(0)
+  binFile.write(struct.pack(BIN_FORMAT, BIN_MAGIC, pnt_num, shapeNum,
+                            BIN_DTYPE.itemsize))
+  binFile.close()
+
+def read_BIN(inFile):
+  '''binary point file from to_BIN: returns the records as a read-only
+     memory map, no data is copied.  Use recs["X"], recs["Y"], recs["ID"]
+     and recs["Group"] for column views and recs[i:j] for ranges'''
+  aFile = open(inFile, 'rb')
+  try:
+    header = aFile.read(BIN_HEADER)
+  finally:
+    aFile.close()
+  assert len(header) == BIN_HEADER, "Not a binary point file: " + inFile
+  magic, n, groups, size = struct.unpack(BIN_FORMAT, header)
+  assert magic == BIN_MAGIC, "Not a binary point file: " + inFile
+  assert size == BIN_DTYPE.itemsize, "Unsupported record size " + str(size)
+  if n == 0:
+    return np.zeros(0, dtype=BIN_DTYPE)
+  return np.memmap(inFile, dtype=BIN_DTYPE, mode='r', offset=BIN_HEADER,
+                   shape=(n,))
+
+def write_points(outFile, outPnts):
+  '''output location and filename, output points
+     binary file (to_BIN) for the BIN_EXTENSIONS, otherwise csv (to_CSV)'''
+  if os.path.splitext(outFile)[1].lower() in BIN_EXTENSIONS:
+    to_BIN(outFile, outPnts)
+  else:
+    to_CSV(outFile, outPnts)
 
 #----------------------------------------------------------
 if __name__ == "__main__":
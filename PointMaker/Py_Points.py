@@ -67,10 +67,24 @@ Py_Points.py
     project
     unit
 
+  ---------------------------------------------------------
+  PointArray class stores many points as x and y columns
+  (float64 NumPy arrays) rather than Point objects.  Columns of an
+  (n, 2) float64 array, eg. a memory-mapped point file, are kept as
+  views and not copied
+
+  supports the Point math, geometric operations and properties
+  above, applied to every point at once, plus:
+    __len__, __getitem__, __iter__
+    to_array    (n, 2) array of x, y
+    to_points   list of Point objects
+
   ---------------------------------------------------------
 
   Conversion
     to_point
+    to_point_array
+    to_xy
     list_to_points
     points_to_list
 
@@ -86,17 +100,29 @@ Py_Points.py
     sort_radial
     sort_dist
 
+  Hulls
+    hull_indices
+    convex_hull
+
   Transformation
     standardize_pnts
+    standardize_array
     transform_back
   '''
 
 #Required modules
 import math
+try:
+  import numpy as np   #required by PointArray and the hulls only
+except ImportError:
+  np = None
+
+HULL_BLOCK = 2**20   #hull_indices works on larger arrays this many points at a time
 
 #Class definitions
-'''Point   2D point class
-   Vector  2D vector class, inherits from Point requires 2 points
+'''Point       2D point class
+   Vector      2D vector class, inherits from Point requires 2 points
+   PointArray  columns of 2D points backed by NumPy arrays
    '''
 
 class Point:
@@ -283,6 +309,31 @@ def to_point(other):
   else:
     return Point(other)
   
+def to_point_array(pnts):
+  '''converts a list of points or x,y pairs, or an (n,2) array,
+  to a PointArray'''
+  if isinstance(pnts, PointArray):
+    return pnts
+  else:
+    return PointArray(pnts)
+
+def to_xy(other):
+  '''returns the x, y values of a point array, point, list/tuple or
+  scalar as a pair, arrays are returned for a PointArray, an (n,2)
+  array or a 1D array (one value per point used for both x and y)'''
+  if isinstance(other, PointArray):
+    return other.x, other.y
+  elif isinstance(other, Point):
+    return other.x, other.y
+  elif isinstance(other, (int, long, float)):
+    return float(other), float(other)
+  elif np is not None and isinstance(other, np.ndarray):
+    if other.ndim == 2:
+      return other[:, 0], other[:, 1]
+    return other, other
+  else:
+    return float(other[0]), float(other[1])
+
 def list_to_points(aList):
   '''convert a list of x,y pairs to point objects'''
   pnts = []
@@ -303,6 +354,8 @@ def points_to_list(pnts):
 #Statistical
 def center(pnts):
   '''average x, y coordinate for points'''
+  if isinstance(pnts, PointArray):
+    return Point(pnts.x.mean(), pnts.y.mean())
   n = len(pnts)
   p = sum_pnts(pnts)
   return Point(p.x / n, p.y / n)
@@ -316,6 +369,8 @@ def center_extent(pnts):
 
 def extent(pnts):
   '''extent of points, returns L, R, B, T'''
+  if isinstance(pnts, PointArray):
+    return [pnts.x.min(), pnts.x.max(), pnts.y.min(), pnts.y.max()]
   n = len(pnts)
   L = 1.0e150; R = 1.0e-150
   B = 1.0e150; T = 1.0e-150
@@ -327,6 +382,8 @@ def extent(pnts):
 def get_xs_ys(pnts):
   '''list of points, return x, y coordinates as separate lists'''
   Xs = [];  Ys = []
+  if isinstance(pnts, PointArray):
+    return [pnts.x, pnts.y]
   if isinstance(pnts[0], (Point)):
     Xs = map((lambda pnt: pnt.x), pnts)  #Get the Xs
     Ys = map((lambda pnt: pnt.y), pnts)  #Get the Ys
@@ -352,6 +409,13 @@ def moments(pnts, cent_pnt):
   '''points, center pnt: returns, variances, std devs and
   covariance for points'''
   n = len(pnts)
+  if isinstance(pnts, PointArray):
+    dx = pnts.x - cent_pnt.x
+    dy = pnts.y - cent_pnt.y
+    var_x = float(np.dot(dx, dx)) / n
+    var_y = float(np.dot(dy, dy)) / n
+    covar = float(np.dot(dx, dy)) / n
+    return [var_x, var_y, math.sqrt(var_x), math.sqrt(var_y), covar]
   pnts_trans = map(lambda pnt: (pnt - cent_pnt), pnts)     #translate
   xx_yy = map(lambda pnt: pnt.sqr(), pnts_trans)
   xx_yy = sum_pnts(xx_yy) / [n,n]   #sum squares
@@ -364,6 +428,8 @@ def moments(pnts, cent_pnt):
 
 def sum_pnts(pnts):
   '''sum the x,y coordinates of points'''
+  if isinstance(pnts, PointArray):
+    return Point(pnts.x.sum(), pnts.y.sum())
   n = len(pnts)
   xs = 0.0; ys = 0.0
   for pnt in pnts:
@@ -375,6 +441,8 @@ def sum_pnts(pnts):
 #Sorting
 def sort_lex(pnts):
   '''sort points lexicographically in-place'''
+  if isinstance(pnts, PointArray):
+    return pnts[np.lexsort((pnts.y, pnts.x))]
   p = points_to_list(pnts)
   p.sort()  #list sort method
   p = list_to_points(p)
@@ -382,6 +450,10 @@ def sort_lex(pnts):
 
 def sort_radial(pnts, cent):
   '''performs a radial sort about the center point'''
+  if isinstance(pnts, PointArray):
+    angles = (pnts - cent).angle()
+    order = np.argsort(angles, kind='mergesort')[::-1]
+    return [pnts[order], angles[order]]
   sorted_pnts =[]
   out_pnts = []
   for pnt in pnts:
@@ -395,6 +467,10 @@ def sort_radial(pnts, cent):
     
 def sort_dist(pnts, source):
   '''sorts points by distance from a source point''' 
+  if isinstance(pnts, PointArray):
+    dists = pnts.distance(source)
+    order = np.argsort(dists, kind='mergesort')
+    return [pnts[order], dists[order]]
   sorted_pnts =[]
   out_pnts = []
   for pnt in pnts:
@@ -405,6 +481,75 @@ def sort_dist(pnts, source):
     out_pnts.append(i[1])
   return [out_pnts, sorted_pnts]
 
+#Hulls
+def hull_indices(pnts):
+  '''indices of the convex hull vertices of points, a PointArray or an
+  (n,2) array, counterclockwise from the lowest x (then y) point.
+  Monotone chain on the lexicographically sorted points, after the
+  points inside the octagon of extreme points are thrown out
+  (Akl-Toussaint).  Collinear and repeated points are dropped.
+  An array of more than HULL_BLOCK points is done a block at a time,
+  the hull of the block hull vertices, so a memory-mapped array is
+  never copied whole.'''
+  if np is not None and isinstance(pnts, np.ndarray) and len(pnts) > HULL_BLOCK:
+    cand = np.concatenate([hull_indices(pnts[i:i + HULL_BLOCK]) + i
+                           for i in range(0, len(pnts), HULL_BLOCK)])
+    return cand[hull_indices(pnts[cand])]
+  if np is not None and isinstance(pnts, np.ndarray):
+    x = np.asarray(pnts[:, 0], dtype=np.float64)
+    y = np.asarray(pnts[:, 1], dtype=np.float64)
+  else:
+    pnts = to_point_array(pnts)
+    x, y = pnts.x, pnts.y
+  keep = np.arange(len(x))
+  if len(x) > 8:
+    #extreme points in directions 0, 45, ... 315 degrees form a
+    #convex octagon, counterclockwise
+    s = x + y; d = x - y
+    ext = [x.argmax(), s.argmax(), y.argmax(), d.argmin(),
+           x.argmin(), s.argmin(), y.argmin(), d.argmax()]
+    inside = np.ones(len(x), dtype=bool)
+    edges = 0
+    for k in range(8):
+      a = ext[k]; b = ext[(k + 1) % 8]
+      ax = x[a]; ay = y[a]; bx = x[b]; by = y[b]
+      if (ax == bx) and (ay == by):
+        continue
+      inside &= ((bx - ax)*(y - ay) - (by - ay)*(x - ax)) > 0.0
+      edges += 1
+    if edges >= 3:
+      keep = np.flatnonzero(~inside)
+  order = keep[np.lexsort((y[keep], x[keep]))]
+  xs = x[order].tolist(); ys = y[order].tolist()
+  ids = order.tolist()
+  def chain(rng):
+    '''one half of the hull, as positions in the sorted points'''
+    h = []
+    for i in rng:
+      while len(h) >= 2:
+        j = h[-2]; k = h[-1]
+        if (xs[k] - xs[j])*(ys[i] - ys[j]) - (ys[k] - ys[j])*(xs[i] - xs[j]) > 0.0:
+          break
+        h.pop()
+      h.append(i)
+    return h
+  n = len(ids)
+  if n < 3:
+    return order[:1] if (n < 2 or (xs[0] == xs[-1] and ys[0] == ys[-1])) else order
+  lower = chain(range(n))
+  upper = chain(range(n - 1, -1, -1))
+  hull = lower[:-1] + upper[:-1]
+  return np.array([ids[i] for i in hull], dtype=np.intp)
+
+def convex_hull(pnts):
+  '''convex hull vertices of points, see hull_indices.  A PointArray
+  or array returns the same type, otherwise a list of the points'''
+  ndx = hull_indices(pnts)
+  if isinstance(pnts, PointArray) or \
+     (np is not None and isinstance(pnts, np.ndarray)):
+    return pnts[ndx]
+  return [pnts[i] for i in ndx]
+
 #Transformation
 def standardize_pnts(pnts):
   '''standardize and rotate points'''
@@ -418,6 +563,8 @@ def standardize_pnts(pnts):
         correlation coefficient zero.
   ''' 
   n = len(pnts)
+  if isinstance(pnts, PointArray):
+    return standardize_array(pnts)
   #
   # Find the center and translate the points
   cent = center(pnts)
@@ -475,6 +622,38 @@ def standardize_pnts(pnts):
   #
   return [pnts_stand, x_c, y_c, s_x, s_y, rho, u, v]
 
+def standardize_array(pnts):
+  '''standardize and rotate a PointArray, see standardize_pnts'''
+  n = len(pnts)
+  x_c = pnts.x.mean(); y_c = pnts.y.mean()
+  dx = pnts.x - x_c
+  dy = pnts.y - y_c
+  s_x = math.sqrt(np.dot(dx, dx) / n)
+  s_y = math.sqrt(np.dot(dy, dy) / n)
+  if s_x != 0.0:
+    dx /= s_x
+  if s_y != 0.0:
+    dy /= s_y
+  rho = float(np.dot(dx, dy)) / n
+  One = 1.0 - 10**-14   #see standardize_pnts
+  if abs(rho) >= One:
+    if rho < 0.0:
+      rho = -1.0
+    else:
+      rho = 1.0
+  if (rho > -1.0):
+    denomX = 1.0 / math.sqrt(2.0*(1.0 + rho))
+  else:
+    denomX = 1.0
+  if (rho < 1.0):
+    denomY = 1.0 / math.sqrt(2.0*(1.0 - rho))
+  else:
+    denomY = 1.0
+  pnts_stand = PointArray((dx + dy) * denomX, (dx - dy) * denomY)
+  u = pnts_stand.x.mean()
+  v = pnts_stand.y.mean()
+  return [pnts_stand, x_c, y_c, s_x, s_y, rho, u, v]
+
 def transform_back(pnts, x_c, y_c, s_x, s_y, rho):
   '''points, x_c, y_c, s_x, s_y, corr coeff'''
   #  takes a series of standardized coordinates from
@@ -494,6 +673,10 @@ def transform_back(pnts, x_c, y_c, s_x, s_y, rho):
   else:
     scale_y = 1.0
   #
+  if isinstance(pnts, PointArray):
+    X1 = pnts.x * scale_x
+    Y1 = pnts.y * scale_y
+    return PointArray(((X1 + Y1)/2.0)*s_x + x_c, ((X1 - Y1)/2.0)*s_y + y_c)
   pnts = []
   X1 = map(lambda x: x * scale_x, Xs)   #scale x
   Y1 = map(lambda y: y * scale_y, Ys)   #scale Y
@@ -560,6 +743,166 @@ class Vector(Point):
       print "Vector length is zero, returning the original vector"
       return self
 
+
+class PointArray:
+  '''enter x and y sequences, a list of points or x,y pairs, an (n,2)
+     array or a count (n points at 0,0)'''
+
+  __array_priority__ = 100.0  #NumPy defers binary operations to the class
+
+#initialize, print, basic math
+  def __init__(self, *args):
+    '''initial values'''
+    if np is None:
+      raise ImportError, "NumPy is required for PointArray"
+    if len(args) == 2:   # x and y columns, float64 views are not copied
+      self.x = np.asarray(args[0], dtype=np.float64).reshape(-1)
+      self.y = np.asarray(args[1], dtype=np.float64).reshape(-1)
+    elif len(args) == 1:
+      vals = args[0]
+      if isinstance(vals, PointArray):
+        self.x = vals.x.copy()
+        self.y = vals.y.copy()
+      elif isinstance(vals, (int, long)):
+        self.x = np.zeros(vals)
+        self.y = np.zeros(vals)
+      elif isinstance(vals, np.ndarray):
+        vals = vals.reshape(-1, 2)
+        self.x = np.asarray(vals[:, 0], dtype=np.float64)
+        self.y = np.asarray(vals[:, 1], dtype=np.float64)
+      else:                # list of points or x,y pairs
+        n = len(vals)
+        self.x = np.empty(n)
+        self.y = np.empty(n)
+        for i in range(n):
+          self.x[i], self.y[i] = to_xy(vals[i])
+    else:
+      self.x = np.zeros(0)
+      self.y = np.zeros(0)
+    assert len(self.x) == len(self.y), "PointArray error: len(x) != len(y)"
+
+  def __repr__(self):
+    '''return the points as a string: called by the repr() and str().'''
+    if len(self) > 6:
+      head = ",".join([repr(p) for p in self[:3]])
+      tail = ",".join([repr(p) for p in self[-3:]])
+      return "PointArray([%s,...,%s], n=%i)" % (head, tail, len(self))
+    return "PointArray([%s])" % (",".join([repr(p) for p in self]))
+
+  def __len__(self):
+    '''number of points'''
+    return len(self.x)
+
+  def __getitem__(self, key):
+    '''a Point for an integer index, a PointArray for a slice or
+    index/boolean array'''
+    if isinstance(key, (int, long, np.integer)):
+      return Point(self.x[key], self.y[key])
+    return PointArray(self.x[key], self.y[key])
+
+  def __iter__(self):
+    '''iterate over the points as Point objects'''
+    for i in range(len(self.x)):
+      yield Point(self.x[i], self.y[i])
+
+  def __add__(self, other):
+    '''add a point array, point, list or scalar'''
+    ox, oy = to_xy(other)
+    return PointArray(self.x + ox, self.y + oy)
+
+  def __div__(self, other):
+    '''divide by a point array, point, list or scalar'''
+    ox, oy = to_xy(other)
+    return PointArray(self.x / ox, self.y / oy)
+
+  def __mul__(self, other):
+    '''multiply by a point array, point, list or scalar'''
+    ox, oy = to_xy(other)
+    return PointArray(self.x * ox, self.y * oy)
+
+  def __sub__(self, other):
+    '''subtract a point array, point, list or scalar'''
+    ox, oy = to_xy(other)
+    return PointArray(self.x - ox, self.y - oy)
+
+  def __radd__(self, other):
+    '''right add'''
+    return self.__add__(other)
+
+  def __rdiv__(self, other):
+    '''right divide'''
+    ox, oy = to_xy(other)
+    return PointArray(ox / self.x, oy / self.y)
+
+  def __rmul__(self, other):
+    '''right multiply'''
+    return self.__mul__(other)
+
+  def __rsub__(self, other):
+    '''right subtract'''
+    ox, oy = to_xy(other)
+    return PointArray(ox - self.x, oy - self.y)
+
+  __truediv__ = __div__
+  __rtruediv__ = __rdiv__
+
+#other math
+  def sqr(self):
+    '''square coordinates'''
+    return PointArray(self.x * self.x, self.y * self.y)
+
+#other properties, one value per point
+  def angle(self):
+    '''angles in degrees from origin (0,0)'''
+    return np.degrees(np.arctan2(self.y, self.x))
+
+  def length(self):
+    '''distances/radii from origin (0,0)'''
+    return np.hypot(self.x, self.y)
+
+  def distance(self, other):
+    '''return the Euclidian distances to a point or between the points
+    of two point arrays'''
+    ox, oy = to_xy(other)
+    return np.hypot(self.x - ox, self.y - oy)
+
+#Geometric operations
+  def move(self, dx, dy):
+    '''moves the existing points shifted by dx and dy
+    see translate if you want to create new points
+    the coordinates are replaced, not written in place, as they may be
+    views of the caller's arrays or of a read-only memmap'''
+    self.x = self.x + dx; self.y = self.y + dy
+    return self
+
+  def perpend(self):
+    '''returns perpendicular points'''
+    return PointArray(-self.y, self.x)
+
+  def rotate(self, theta):
+    '''returns points rotated by theta degrees'''
+    theta = math.radians(theta)
+    c = math.cos(theta); s = math.sin(theta)
+    x = self.x;  y = self.y
+    return PointArray(x * c - y * s, x * s + y * c)
+
+  def scale(self, a, b):
+    '''returns points scaled by a and b for the x and y direction'''
+    return PointArray(self.x * a, self.y * b)
+
+  def translate(self, dx, dy):
+    '''returns points shifted by dx and dy (see move as well)'''
+    return PointArray(self.x + dx, self.y + dy)
+
+#Conversion
+  def to_array(self):
+    '''(n, 2) array of the x, y coordinates'''
+    return np.column_stack((self.x, self.y))
+
+  def to_points(self):
+    '''list of Point objects'''
+    return map(Point, self.x.tolist(), self.y.tolist())
+
 #-------------------------------------------------------------------- 
 if __name__ == "__main__":
   print "Py_Points loaded"
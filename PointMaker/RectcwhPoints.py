@@ -106,9 +106,9 @@ if outFC != "#":
   arcpy.AddMessage("\n" + "You can join the original table to " \
                 + "this shapefile table if you want other attributes." + "\n")
 #
-#optional csv file creation or output to screen
+#optional csv/binary point file creation or output to screen
 if outCSV != "#":
-  PM.to_CSV(outCSV, outPnts)
+  PM.write_points(outCSV, outPnts)
 #
 if outToScreen == "true":
   py_gp.print_pnts(outPnts, arcpy)
@@ -0,0 +1,27 @@
+"""
+PoolHelper.py
+Process pools for the script tools.  The tool folders add this folder to sys.path to
+import it, and the worker processes get the same sys.path from multiprocessing.
+"""
+import os
+import sys
+import multiprocessing
+
+def poolExecutable():
+    """
+    Python executable for the worker processes.  ArcMap and ArcCatalog run script
+    tools in-process so sys.executable is not python.
+    """
+    exe = sys.executable
+    if not os.path.basename(exe).lower().startswith("python"):
+        exe = os.path.join(sys.exec_prefix, "pythonw.exe")
+    return exe
+
+def makePool(processes):
+    """
+    A multiprocessing.Pool of processes workers, started with poolExecutable() on
+    Windows.  The worker functions must be importable, not defined in the tool script.
+    """
+    if sys.platform == "win32":
+        multiprocessing.set_executable(poolExecutable())
+    return multiprocessing.Pool(processes)